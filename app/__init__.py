@@ -9,6 +9,31 @@ def create_app():
     app.config.from_object(Config)
     app.config.from_pyfile("config.py", silent=True)
 
+    # Pooled DB connections (returned to the pool at app-context teardown)
+    from app.models import db
+
+    db.init_app(app)
+
+    # Per-request SQL timing (Server-Timing header + structured log line)
+    from app.models import instrumentation
+
+    instrumentation.init_app(app)
+
+    # Prometheus metrics (served at /metrics)
+    from app.services import metrics
+
+    metrics.init_app(app)
+
+    # Uploaded image variants + long-lived caching of content-hashed files
+    from app.services import images
+
+    images.init_app(app)
+
+    # Fingerprinted, precompressed CSS/JS bundles (asset_url() in templates)
+    from app.services import assets
+
+    assets.init_app(app)
+
     # Register main routes
     from app.routes.main import main_bp
 
@@ -28,4 +53,13 @@ def create_app():
     app.register_blueprint(user_bp)
     app.register_blueprint(hotel_bp)
 
+    # CLI commands
+    from app.models import migrations
+    from app.services import analytics
+    from app.services import reservations
+
+    migrations.init_app(app)
+    analytics.init_app(app)
+    reservations.init_app(app)
+
     return app
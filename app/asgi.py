@@ -0,0 +1,362 @@
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import render_template
+from itsdangerous import BadSignature
+from config import Config
+from app import create_app
+from app.models.aio_db import (
+    close_async_pool,
+    get_async_listen_connection,
+    get_async_pool,
+    to_asyncpg,
+)
+from app.routes.user import process_confirmed_order
+from app.services.order_feed import (
+    KITCHEN_ORDER_SELECT,
+    ORDER_EVENTS_CHANNEL,
+    REMOVAL_EVENTS,
+    format_kitchen_order,
+)
+from app.services.qr import ensure_qr
+
+# ASGI serving mode: the long-lived / I/O-bound endpoints below run as
+# coroutines on asyncpg; every other route is the regular Flask app,
+# bridged through asgiref. Run with:  uvicorn asgi:app
+
+
+# ---------------- HTTP HELPERS ----------------
+def load_session(flask_app, scope):
+    cookie_name = flask_app.config["SESSION_COOKIE_NAME"]
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(cookie_name)
+            if morsel is None:
+                return {}
+            serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+            max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+            try:
+                return serializer.loads(morsel.value, max_age=max_age)
+            except BadSignature:
+                return {}
+    return {}
+
+
+async def send_response(send, status, body=b"", content_type=None, headers=()):
+    raw_headers = [(k.encode(), v.encode()) for k, v in headers]
+    if content_type:
+        raw_headers.append((b"content-type", content_type.encode()))
+    raw_headers.append((b"content-length", str(len(body)).encode()))
+
+    await send(
+        {"type": "http.response.start", "status": status, "headers": raw_headers}
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status, data):
+    await send_response(
+        send, status, json.dumps(data).encode(), content_type="application/json"
+    )
+
+
+async def send_redirect(send, location):
+    await send_response(send, 302, headers=[("location", location)])
+
+
+# ---------------- ASYNC ORDER FEED ----------------
+class AsyncOrderFeed:
+    """asyncio twin of services.order_feed.OrderFeed (one LISTEN per process)."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self._subscribers = {}  # hotel_id -> set of asyncio.Queue
+        self._conn = None
+        self._start_lock = asyncio.Lock()
+        self._closing = False
+        self._reconnecting = None  # task re-LISTENing after a drop
+        self._health = None  # task pinging the LISTEN connection
+
+    async def _connect(self):
+        # Caller holds _start_lock
+        if self._conn is not None and not self._conn.is_closed():
+            return
+        self._conn = await get_async_listen_connection()
+        self._conn.add_termination_listener(self._on_terminated)
+        await self._conn.add_listener(ORDER_EVENTS_CHANNEL, self._on_notify)
+        if self._health is None or self._health.done():
+            self._health = asyncio.ensure_future(self._check_health())
+
+    async def subscribe(self, hotel_id):
+        async with self._start_lock:
+            await self._connect()
+
+        q = asyncio.Queue(maxsize=Config.ORDER_FEED_QUEUE_SIZE)
+        self._subscribers.setdefault(hotel_id, set()).add(q)
+        return q
+
+    def _on_terminated(self, conn):
+        if self._closing or conn is not self._conn:
+            return
+        if self._reconnecting is None or self._reconnecting.done():
+            self._reconnecting = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        # Nobody connected: the next subscribe() opens a fresh LISTEN
+        while self._subscribers and not self._closing:
+            try:
+                async with self._start_lock:
+                    await self._connect()
+            except Exception as e:
+                print("ORDER FEED ERROR:", e)
+                await asyncio.sleep(Config.ORDER_FEED_RECONNECT_DELAY)
+                continue
+
+            # Anything missed while disconnected needs a full reload
+            self._broadcast({"event": "resync"})
+            return
+
+    async def _check_health(self):
+        # A silently dropped socket may never fire the termination listener
+        while not self._closing:
+            await asyncio.sleep(Config.ORDER_FEED_HEARTBEAT)
+            conn = self._conn
+            if conn is None or conn.is_closed():
+                continue
+            try:
+                await asyncio.wait_for(
+                    conn.fetchval("SELECT 1"), timeout=Config.ORDER_FEED_HEARTBEAT
+                )
+            except Exception as e:
+                print("ORDER FEED ERROR:", e)
+                conn.terminate()
+
+    def unsubscribe(self, hotel_id, q):
+        subscribers = self._subscribers.get(hotel_id)
+        if subscribers:
+            subscribers.discard(q)
+            if not subscribers:
+                del self._subscribers[hotel_id]
+
+    def _on_notify(self, conn, pid, channel, payload):
+        event = json.loads(payload)
+        if event["hotel_id"] in self._subscribers:
+            asyncio.ensure_future(self._dispatch(event))
+
+    async def _dispatch(self, event):
+        message = {"event": event["event"], "order_id": event["order_id"]}
+
+        if event["event"] not in REMOVAL_EVENTS:
+            pool = await get_async_pool()
+            query, args = to_asyncpg(
+                KITCHEN_ORDER_SELECT + " WHERE o.id = %s", (event["order_id"],)
+            )
+            row = await pool.fetchrow(query, *args)
+            if row is None:
+                return
+            with self.flask_app.test_request_context():
+                message["html"] = render_template(
+                    "hotel/_order_row.html", o=format_kitchen_order(row)
+                )
+
+        for q in list(self._subscribers.get(event["hotel_id"], ())):
+            self._offer(q, message)
+
+    def _broadcast(self, message):
+        for subscribers in list(self._subscribers.values()):
+            for q in list(subscribers):
+                self._offer(q, message)
+
+    def _offer(self, q, message):
+        if q.full():
+            # A stalled screen falls back to reloading the page
+            while not q.empty():
+                q.get_nowait()
+            q.put_nowait({"event": "resync"})
+        else:
+            q.put_nowait(message)
+
+    async def close(self):
+        self._closing = True
+        for task in (self._reconnecting, self._health):
+            if task is not None:
+                task.cancel()
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+
+
+async def orders_stream(flask_app, feed, scope, receive, send):
+    session = load_session(flask_app, scope)
+    if session.get("role") != "hotel":
+        return await send_response(send, 401)
+
+    pool = await get_async_pool()
+    hotel_id = session.get("hotel_id")
+    if hotel_id is not None:
+        row = await pool.fetchrow(
+            "SELECT id, status FROM hotels WHERE id = $1", hotel_id
+        )
+    else:
+        # Sessions created before hotel_id was stored at login, as in
+        # identity.current_hotel_id()
+        row = await pool.fetchrow(
+            "SELECT id, status FROM hotels WHERE login_id = $1",
+            session.get("login_id"),
+        )
+    if row is None or row["status"] != "approved":
+        return await send_response(send, 401)
+    hotel_id = row["id"]
+
+    events = await feed.subscribe(hotel_id)
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        chunk = "retry: 3000\n\n"
+
+        while not disconnected.is_set():
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk.encode(),
+                    "more_body": True,
+                }
+            )
+            try:
+                message = await asyncio.wait_for(
+                    events.get(), timeout=Config.ORDER_FEED_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                chunk = ": keep-alive\n\n"
+                continue
+
+            data = {"order_id": message.get("order_id")}
+            if message.get("html"):
+                data["html"] = message["html"]
+            chunk = f"event: {message['event']}\ndata: {json.dumps(data)}\n\n"
+
+    except OSError:
+        pass
+    finally:
+        watcher.cancel()
+        feed.unsubscribe(hotel_id, events)
+
+
+# ---------------- ASYNC USER ENDPOINTS ----------------
+async def order_qr_status(flask_app, scope, receive, send, order_id):
+    session = load_session(flask_app, scope)
+    if session.get("role") != "user":
+        return await send_json(send, 401, {"ready": False, "error": "Unauthorized"})
+
+    order_id = int(order_id)
+    pool = await get_async_pool()
+    row = await pool.fetchrow(
+        "SELECT qr_code, qr_image_url FROM orders WHERE id = $1 AND user_id = $2",
+        order_id,
+        session.get("user_id"),
+    )
+    if row is None:
+        return await send_json(send, 404, {"ready": False, "error": "Order not found"})
+
+    qr_url = row["qr_image_url"]
+    if row["qr_code"] and not qr_url:
+        qr_url = await asyncio.to_thread(ensure_qr, order_id)
+
+    await send_json(send, 200, {"ready": bool(qr_url), "qr_url": qr_url})
+
+
+async def payment_success(flask_app, scope, receive, send, order_id):
+    session = load_session(flask_app, scope)
+    if session.get("role") != "user":
+        return await send_redirect(send, "/login")
+
+    order_id = int(order_id)
+    pool = await get_async_pool()
+
+    # Repeat callbacks for a confirmed order take no lock and write nothing
+    row = await pool.fetchrow(
+        "SELECT qr_code, order_status FROM orders WHERE id = $1 AND user_id = $2",
+        order_id,
+        session.get("user_id"),
+    )
+    if row is None:
+        return await send_response(send, 404, b"Order not found")
+    if row["qr_code"]:
+        return await send_redirect(send, f"/user/order-success/{order_id}")
+    if row["order_status"] == "cancelled":
+        return await send_response(send, 410, b"Order expired")
+
+    # Confirmation itself (stock, QR, metrics) is the sync code path; it is
+    # one short transaction, run on a thread
+    try:
+        await asyncio.to_thread(process_confirmed_order, order_id)
+    except Exception as e:
+        print("CONFIRM ERROR:", e)
+        return await send_response(send, 500, b"Order confirmation failed")
+
+    await send_redirect(send, f"/user/order-success/{order_id}")
+
+
+# ---------------- APP ----------------
+def create_asgi_app():
+    flask_app = create_app()
+    wsgi_app = WsgiToAsgi(flask_app)
+    feed = AsyncOrderFeed(flask_app)
+
+    async def stream(scope, receive, send):
+        await orders_stream(flask_app, feed, scope, receive, send)
+
+    async def qr_status(scope, receive, send, order_id):
+        await order_qr_status(flask_app, scope, receive, send, order_id)
+
+    async def payment(scope, receive, send, order_id):
+        await payment_success(flask_app, scope, receive, send, order_id)
+
+    routes = [
+        (re.compile(r"^/hotel/orders/stream$"), stream),
+        (re.compile(r"^/user/order-qr/(\d+)$"), qr_status),
+        (re.compile(r"^/user/payment-success/(\d+)$"), payment),
+    ]
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await feed.close()
+                    await close_async_pool()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            for pattern, handler in routes:
+                match = pattern.match(scope["path"])
+                if match:
+                    return await handler(scope, receive, send, *match.groups())
+
+        await wsgi_app(scope, receive, send)
+
+    app.flask_app = flask_app
+    return app
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import re
+
+from config import Config
+
+# asyncpg is only needed for the ASGI serving mode (see app/asgi.py)
+_pool = None
+_pool_lock = None
+
+
+async def _init_connection(conn):
+    # Decode json/jsonb like psycopg2 does so shared helpers see lists/dicts
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+def _connect_kwargs():
+    return {
+        "database": Config.DB_NAME,
+        "user": Config.DB_USER,
+        "password": Config.DB_PASSWORD,
+        "host": Config.DB_HOST,
+        "port": int(Config.DB_PORT),
+    }
+
+
+async def get_async_pool():
+    global _pool, _pool_lock
+    import asyncpg
+
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(
+                min_size=Config.ASYNC_DB_POOL_MIN,
+                max_size=Config.ASYNC_DB_POOL_MAX,
+                init=_init_connection,
+                **_connect_kwargs(),
+            )
+    return _pool
+
+
+async def get_async_listen_connection():
+    import asyncpg
+
+    return await asyncpg.connect(**_connect_kwargs())
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+# ---------------- PLACEHOLDER CONVERSION ----------------
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+def to_asyncpg(query, params=()):
+    """Rewrite a psycopg2 query (``%s`` / ``%(name)s``) for asyncpg (``$n``).
+
+    Lets the async endpoints reuse the exact SQL of their sync twins.
+    """
+    args = []
+    positions = {}
+    positional = iter(params) if not isinstance(params, dict) else None
+
+    def replace(match):
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        if token == "%s":
+            args.append(next(positional))
+            return f"${len(args)}"
+
+        name = match.group(1)
+        if name not in positions:
+            args.append(params[name])
+            positions[name] = len(args)
+        return f"${positions[name]}"
+
+    return _PLACEHOLDER.sub(replace, query), args
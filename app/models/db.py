@@ -1,10 +1,22 @@
+import os
+import threading
+import time
+
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
+from flask import g, has_app_context
 from config import Config
+from app.models.instrumentation import InstrumentedCursor
+
 
+class PoolTimeout(Exception):
+    pass
 
-def get_db_connection():
-    conn = psycopg2.connect(
+
+# ---------------- RAW CONNECTION ----------------
+def _connect():
+    return psycopg2.connect(
         dbname=Config.DB_NAME,
         user=Config.DB_USER,
         password=Config.DB_PASSWORD,
@@ -12,4 +24,306 @@ def get_db_connection():
         port=Config.DB_PORT,
         cursor_factory=RealDictCursor,
     )
+
+
+def get_direct_connection(autocommit=False):
+    # Unpooled connection for long-lived uses such as LISTEN
+    conn = _connect()
+    if autocommit:
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+
+# ---------------- CONNECTION POOL ----------------
+class ConnectionPool:
+    def __init__(
+        self,
+        minconn,
+        maxconn,
+        timeout=10.0,
+        max_lifetime=1800.0,
+        health_check_interval=30.0,
+        connect=_connect,
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, created_at, last_used)]
+        self._in_use = {}  # id(conn) -> created_at
+        self._pending = 0  # checkouts between leaving _idle and entering _in_use
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+
+        for _ in range(minconn):
+            self._idle.append(self._new_conn())
+
+    def _new_conn(self):
+        conn = self._connect()
+        self._bump("created")
+        now = time.monotonic()
+        return (conn, now, now)
+
+    def _bump(self, key, amount=1):
+        with self._cond:
+            self._stats[key] += amount
+
+    def _expired(self, created_at, now):
+        return self.max_lifetime and now - created_at > self.max_lifetime
+
+    def _healthy(self, conn, last_used, now):
+        if conn.closed:
+            return False
+        if now - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                # The slot stays reserved (in _pending) while the connection
+                # is checked or opened outside the lock, so other threads
+                # cannot open one past maxconn meanwhile
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    self._pending += 1
+                    break
+
+                if len(self._in_use) + self._pending < self.maxconn:
+                    conn, created_at, last_used = None, None, None
+                    self._pending += 1
+                    break
+
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += time.monotonic() - started
+
+        try:
+            if conn is None:
+                conn, created_at, last_used = self._new_conn()
+            else:
+                # Health check / recycling happen outside the lock
+                now = time.monotonic()
+                stale = None
+                if self._expired(created_at, now):
+                    stale = "recycled"
+                elif not self._healthy(conn, last_used, now):
+                    stale = "health_check_failures"
+
+                if stale:
+                    self._discard(conn)
+                    self._bump(stale)
+                    conn, created_at, last_used = self._new_conn()
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._pending -= 1
+            self._in_use[id(conn)] = created_at
+            self._stats["checkouts"] += 1
+
+        return conn
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+
+        if not discard and not conn.closed:
+            try:
+                # Never hand out a connection mid-transaction
+                status = conn.get_transaction_status()
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        now = time.monotonic()
+        if created_at is not None and self._expired(created_at, now):
+            self._bump("recycled")
+            discard = True
+
+        with self._cond:
+            # Never keep more than maxconn connections open
+            size = len(self._idle) + len(self._in_use) + self._pending
+            if discard or conn.closed or self._closed or size >= self.maxconn:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at or now, now))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data["in_use"] = len(self._in_use) + self._pending
+            data["idle"] = len(self._idle)
+            data["size"] = data["in_use"] + data["idle"]
+            data["max_size"] = self.maxconn
+        return data
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _pool_pid
+
+    # A forked worker must not share its parent's sockets
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(
+                minconn=Config.DB_POOL_MIN,
+                maxconn=Config.DB_POOL_MAX,
+                timeout=Config.DB_POOL_TIMEOUT,
+                max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+                health_check_interval=Config.DB_POOL_HEALTH_CHECK_INTERVAL,
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
+
+def pool_stats():
+    if _pool is None or _pool_pid != os.getpid():
+        return {}
+    return _pool.stats()
+
+
+# ---------------- POOLED CONNECTION ----------------
+class PooledConnection:
+    """Proxy around a pooled psycopg2 connection.
+
+    ``close()`` keeps the original semantics (uncommitted work is discarded)
+    but hands the connection back instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, conn, scoped=False):
+        self._pool = pool
+        self._conn = conn
+        self._scoped = scoped
+        self.in_use = True
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        cur = self._conn.cursor(*args, **kwargs)
+        if Config.SQL_INSTRUMENTATION:
+            return InstrumentedCursor(cur)
+        return cur
+
+    def close(self):
+        if not self.in_use:
+            return
+        self.in_use = False
+
+        if self._scoped:
+            # Stay checked out for the rest of the request
+            try:
+                if not self._conn.closed:
+                    self._conn.rollback()
+            except psycopg2.Error:
+                pass
+            return
+
+        self._pool.putconn(self._conn)
+
+    def release(self):
+        self.in_use = False
+        self._pool.putconn(self._conn)
+
+
+def get_db_connection(scoped=True):
+    pool = get_pool()
+
+    # Unscoped connections go straight back to the pool on close(); used
+    # outside requests and by streamed responses that outlive the view.
+    if not scoped or not has_app_context():
+        return PooledConnection(pool, pool.getconn())
+
+    # Request-scoped checkout: reuse a connection the request already
+    # holds once its previous user has closed it.
+    scoped = g.setdefault("_db_connections", [])
+    for conn in scoped:
+        if not conn.in_use and not conn.closed:
+            conn.in_use = True
+            return conn
+
+    conn = PooledConnection(pool, pool.getconn(), scoped=True)
+    scoped.append(conn)
     return conn
+
+
+def release_db_connections(exc=None):
+    for conn in g.pop("_db_connections", []):
+        conn.release()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connections)
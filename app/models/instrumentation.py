@@ -0,0 +1,174 @@
+import json
+import logging
+import re
+import time
+
+from flask import g, has_request_context, request
+from config import Config
+
+logger = logging.getLogger("app.sql")
+
+# Callables taking (seconds, failed) for every timed statement, in or out
+# of a request (e.g. services.metrics)
+query_observers = []
+
+
+# ---------------- PER-REQUEST STATS ----------------
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.slowest = (0.0, None)  # (seconds, sql)
+        self.statements = {}  # normalized sql -> executions
+
+    def record(self, sql, seconds, failed=False):
+        self.count += 1
+        self.total += seconds
+        if failed:
+            self.errors += 1
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, sql)
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def repeated(self, threshold):
+        # The same statement text run many times in one request is the
+        # usual N+1 shape (a query inside a per-row/per-item loop)
+        return [
+            {"sql": sql[:200], "count": count}
+            for sql, count in self.statements.items()
+            if count >= threshold
+        ]
+
+
+def current_stats():
+    if not has_request_context():
+        return None
+    if "_sql_stats" not in g:
+        g._sql_stats = QueryStats()
+    return g._sql_stats
+
+
+def normalize_sql(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return re.sub(r"\s+", " ", str(query)).strip()
+
+
+# ---------------- CURSOR WRAPPER ----------------
+class InstrumentedCursor:
+    """Times execute()/executemany() into the current request's stats."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # Settings such as itersize/arraysize belong to the real cursor
+        if name == "_cursor":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def _timed(self, method, query, args):
+        stats = current_stats()
+        if stats is None and not query_observers:
+            return method(query, *args)
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = method(query, *args)
+            failed = False
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            for observer in query_observers:
+                observer(seconds, failed)
+            if stats is not None:
+                self._record(stats, query, seconds, failed)
+
+    def _record(self, stats, query, seconds, failed):
+        sql = normalize_sql(query)
+        stats.record(sql, seconds, failed)
+        if seconds * 1000 >= Config.SQL_SLOW_QUERY_MS:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_query",
+                        "path": request.path,
+                        "ms": round(seconds * 1000, 2),
+                        "sql": sql[:500],
+                    }
+                )
+            )
+
+    def execute(self, query, *args):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, *args):
+        return self._timed(self._cursor.executemany, query, args)
+
+
+# ---------------- REQUEST HOOKS ----------------
+def start_request():
+    g._request_started = time.perf_counter()
+
+
+def finish_request(response):
+    stats = g.pop("_sql_stats", None)
+    if stats is None:
+        return response
+
+    db_ms = round(stats.total * 1000, 2)
+    response.headers.add(
+        "Server-Timing", f'db;dur={db_ms};desc="{stats.count} queries"'
+    )
+
+    repeated = stats.repeated(Config.SQL_N_PLUS_ONE_THRESHOLD)
+    slowest_s, slowest_sql = stats.slowest
+    line = {
+        "event": "request_sql",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "ms": round((time.perf_counter() - g.get("_request_started", 0)) * 1000, 2),
+        "queries": stats.count,
+        "query_errors": stats.errors,
+        "db_ms": db_ms,
+        "slowest_ms": round(slowest_s * 1000, 2),
+        "slowest_sql": (slowest_sql or "")[:200],
+    }
+    if repeated:
+        line["n_plus_one"] = repeated
+        logger.warning(json.dumps(line))
+    else:
+        logger.info(json.dumps(line))
+
+    return response
+
+
+def init_app(app):
+    if not Config.SQL_INSTRUMENTATION:
+        return
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(Config.SQL_LOG_LEVEL)
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,232 @@
+import os
+import re
+
+import click
+from app.models.db import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "migrations"
+)
+
+# Arbitrary key so two deploys never apply migrations at the same time
+MIGRATION_LOCK_ID = 74230001
+
+
+# ---------------- VERSIONED MIGRATIONS ----------------
+def available_migrations():
+    """Return ``[(version, name, path)]`` from migrations/NNNN_name.sql."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"^(\d+)_(\w+)\.sql$", filename)
+        if match:
+            found.append(
+                (match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename))
+            )
+    return found
+
+
+def applied_versions(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cur.fetchall()}
+
+
+def upgrade():
+    """Apply pending migrations in order, each in its own transaction."""
+    applied = []
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        for version, name, path in available_migrations():
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            if version in applied_versions(cur):
+                conn.commit()
+                continue
+
+            with open(path, encoding="utf-8") as f:
+                cur.execute(f.read())
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            conn.commit()
+            applied.append(f"{version}_{name}")
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    return applied
+
+
+# ---------------- SEQ SCAN REPORT ----------------
+# Representative route queries with sample parameters; EXPLAIN is run
+# without ANALYZE so nothing executes.
+HOT_QUERIES = [
+    (
+        "kitchen queue load",
+        """
+        SELECT o.id, u.user_full_name, u.is_premium
+        FROM orders o
+        JOIN users u ON o.user_id = u.id
+        WHERE o.hotel_id = %s AND o.order_status NOT IN ('completed', 'cancelled')
+        """,
+        (1,),
+    ),
+    (
+        "kitchen order lines",
+        """
+        SELECT oi.menu_id, oi.item_name, oi.qty
+        FROM order_items oi
+        WHERE oi.order_id = %s
+        """,
+        (1,),
+    ),
+    (
+        "user.my_orders",
+        """
+        SELECT o.id, h.hotel_name
+        FROM orders o
+        JOIN hotels h ON h.id = o.hotel_id
+        WHERE o.user_id = %s
+          AND (o.order_status NOT IN ('completed', 'cancelled')
+               OR (o.order_status = 'completed' AND o.feedback_given = false))
+        ORDER BY o.created_at DESC
+        """,
+        (1,),
+    ),
+    (
+        "user.menu",
+        """
+        SELECT id, item_name, category, price, image
+        FROM menus
+        WHERE hotel_id = %s AND is_available = TRUE
+        ORDER BY category, item_name
+        """,
+        (1,),
+    ),
+    (
+        "hotel.complete_order (ledger check)",
+        """
+        SELECT COUNT(*) FROM inventory_ledger WHERE order_id = %s
+        """,
+        (1,),
+    ),
+    (
+        "hotel.feedbacks",
+        """
+        SELECT f.id, u.user_full_name
+        FROM feedbacks f
+        JOIN users u ON f.user_id = u.id
+        WHERE f.hotel_id = %s
+        ORDER BY f.created_at DESC
+        """,
+        (1,),
+    ),
+    (
+        "admin.orders",
+        """
+        SELECT o.id FROM orders o
+        ORDER BY o.order_time DESC, o.id DESC
+        LIMIT 51
+        """,
+        (),
+    ),
+    (
+        "user.hotel_list (search)",
+        """
+        SELECT id FROM hotels
+        WHERE status = 'approved' AND is_active = TRUE AND is_open = TRUE
+          AND (hotel_name ILIKE %s OR location ILIKE %s)
+        """,
+        ("%spice%", "%spice%"),
+    ),
+]
+
+
+def _seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def explain_hot_queries():
+    """Return ``[(route, [relations read by seq scan])]``."""
+    report = []
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        for route, query, params in HOT_QUERIES:
+            cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+            plan = cur.fetchone()["QUERY PLAN"][0]["Plan"]
+            report.append((route, _seq_scans(plan)))
+    finally:
+        cur.close()
+        conn.close()
+
+    return report
+
+
+# ---------------- CLI ----------------
+@click.group("db")
+def db_cli():
+    """Schema migrations and query plan checks."""
+
+
+@db_cli.command("upgrade")
+def upgrade_command():
+    """Apply pending migrations."""
+    applied = upgrade()
+    for name in applied:
+        click.echo(f"Applied {name}")
+    if not applied:
+        click.echo("Database is up to date.")
+
+
+@db_cli.command("status")
+def status_command():
+    """List migrations and whether they are applied."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        applied = applied_versions(cur)
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    for version, name, _ in available_migrations():
+        mark = "x" if version in applied else " "
+        click.echo(f"[{mark}] {version}_{name}")
+
+
+@db_cli.command("explain")
+def explain_command():
+    """Report route queries whose plans contain sequential scans."""
+    for route, tables in explain_hot_queries():
+        if tables:
+            click.echo(f"SEQ SCAN  {route}: {', '.join(sorted(set(tables)))}")
+        else:
+            click.echo(f"ok        {route}")
+
+
+def init_app(app):
+    app.cli.add_command(db_cli)
@@ -0,0 +1,53 @@
+import base64
+from datetime import datetime
+
+from flask import request
+from config import Config
+
+
+# ---------------- KEYSET (CURSOR) PAGINATION ----------------
+# Pages are ordered by (timestamp DESC, id DESC); the cursor carries the
+# last row's key so the next page is a plain index range scan instead of
+# an OFFSET that gets slower the deeper you go.
+
+
+def encode_cursor(ts, row_id):
+    raw = f"{ts.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_size():
+    size = request.args.get("per_page", type=int) or Config.ADMIN_PAGE_SIZE
+    return max(1, min(size, Config.ADMIN_PAGE_SIZE_MAX))
+
+
+def keyset_filter(ts_col, id_col, cursor):
+    """Return the ``(sql, params)`` condition selecting rows after ``cursor``."""
+    if not cursor:
+        return "TRUE", []
+    return f"({ts_col}, {id_col}) < (%s, %s)", list(cursor)
+
+
+def fetch_page(cur, query, params, size, ts_key, id_key="id"):
+    """Run ``query`` (already ordered) for one page and the next cursor."""
+    cur.execute(query + " LIMIT %s", list(params) + [size + 1])
+    rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[ts_key], last[id_key])
+
+    return rows, next_cursor
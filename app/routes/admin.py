@@ -1,14 +1,31 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+)
 from app.models.db import get_db_connection
+from app.models.pagination import decode_cursor, fetch_page, keyset_filter, page_size
+from app.services.analytics import (
+    dashboard_analytics,
+    dashboard_counts,
+    invalidate_dashboard_counts,
+)
+from app.services.export import EXPORT_FORMATS, export_filters, stream_rows
+from app.services.identity import has_role, invalidate_hotel
+from app.services.menu_cache import invalidate_menu
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
 
 # ----------------- AUTH GUARD -----------------
 def admin_required():
-    if "login_id" not in session or session.get("role") != "admin":
-        return False
-    return True
+    return has_role("admin")
 
 
 # ----------------- DASHBOARD -----------------
@@ -17,27 +34,33 @@ def dashboard():
     if not admin_required():
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
+    counts = dashboard_counts()
 
-    cur.execute("SELECT COUNT(*) AS total FROM hotels")
-    total_hotels = cur.fetchone()["total"]
+    return render_template(
+        "admin/dashboard.html",
+        total_hotels=counts["total_hotels"],
+        total_users=counts["total_users"],
+        pending_hotels=counts["pending_hotels"],
+    )
 
-    cur.execute("SELECT COUNT(*) AS total FROM users")
-    total_users = cur.fetchone()["total"]
 
-    cur.execute("SELECT COUNT(*) AS total FROM hotels WHERE status='pending'")
-    pending_hotels = cur.fetchone()["total"]
+# ----------------- ANALYTICS -----------------
+@admin_bp.route("/analytics")
+def analytics():
+    if not admin_required():
+        return redirect(url_for("auth.login"))
 
-    cur.close()
-    conn.close()
+    days = max(1, min(request.args.get("days", 30, type=int), 366))
+    return render_template("admin/analytics.html", **dashboard_analytics(days))
 
-    return render_template(
-        "admin/dashboard.html",
-        total_hotels=total_hotels,
-        total_users=total_users,
-        pending_hotels=pending_hotels,
-    )
+
+@admin_bp.route("/analytics.json")
+def analytics_json():
+    if not admin_required():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    days = max(1, min(request.args.get("days", 30, type=int), 366))
+    return jsonify(dashboard_analytics(days))
 
 
 # ----------------- HOTEL MANAGEMENT -----------------
@@ -46,23 +69,34 @@ def hotels():
     if not admin_required():
         return redirect(url_for("auth.login"))
 
+    size = page_size()
+    after_sql, after_params = keyset_filter(
+        "h.created_at", "h.id", decode_cursor(request.args.get("after"))
+    )
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute(
-        """
+    hotels, next_cursor = fetch_page(
+        cur,
+        f"""
         SELECT h.*, l.email
         FROM hotels h
         JOIN logins l ON h.login_id = l.id
-        ORDER BY h.created_at DESC
-    """
+        WHERE {after_sql}
+        ORDER BY h.created_at DESC, h.id DESC
+    """,
+        after_params,
+        size,
+        ts_key="created_at",
     )
-    hotels = cur.fetchall()
 
     cur.close()
     conn.close()
 
-    return render_template("admin/hotels.html", hotels=hotels)
+    return render_template(
+        "admin/hotels.html", hotels=hotels, next_cursor=next_cursor, per_page=size
+    )
 
 
 @admin_bp.route("/hotels/action", methods=["POST"])
@@ -90,6 +124,10 @@ def hotel_action():
     cur.close()
     conn.close()
 
+    invalidate_dashboard_counts()
+    invalidate_menu(hotel_id)
+    invalidate_hotel(hotel_id)
+
     flash("Hotel status updated successfully", "success")
     return redirect(url_for("admin.hotels"))
 
@@ -100,23 +138,34 @@ def users():
     if not admin_required():
         return redirect(url_for("auth.login"))
 
+    size = page_size()
+    after_sql, after_params = keyset_filter(
+        "u.created_at", "u.id", decode_cursor(request.args.get("after"))
+    )
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute(
-        """
+    users, next_cursor = fetch_page(
+        cur,
+        f"""
         SELECT u.*, l.email
         FROM users u
         JOIN logins l ON u.login_id = l.id
-        ORDER BY u.created_at DESC
-    """
+        WHERE {after_sql}
+        ORDER BY u.created_at DESC, u.id DESC
+    """,
+        after_params,
+        size,
+        ts_key="created_at",
     )
-    users = cur.fetchall()
 
     cur.close()
     conn.close()
 
-    return render_template("admin/users.html", users=users)
+    return render_template(
+        "admin/users.html", users=users, next_cursor=next_cursor, per_page=size
+    )
 
 
 # ----------------- ORDERS (PLACEHOLDER) -----------------
@@ -125,11 +174,17 @@ def orders():
     if not admin_required():
         return redirect(url_for("auth.login"))
 
+    size = page_size()
+    after_sql, after_params = keyset_filter(
+        "o.order_time", "o.id", decode_cursor(request.args.get("after"))
+    )
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    cur.execute(
-        """
+    orders, next_cursor = fetch_page(
+        cur,
+        f"""
         SELECT
             o.id,
             o.total_people,
@@ -141,16 +196,20 @@ def orders():
         FROM orders o
         JOIN users u ON o.user_id = u.id
         JOIN hotels h ON o.hotel_id = h.id
-        ORDER BY o.order_time DESC
-    """
+        WHERE {after_sql}
+        ORDER BY o.order_time DESC, o.id DESC
+    """,
+        after_params,
+        size,
+        ts_key="order_time",
     )
 
-    orders = cur.fetchall()
-
     cur.close()
     conn.close()
 
-    return render_template("admin/orders.html", orders=orders)
+    return render_template(
+        "admin/orders.html", orders=orders, next_cursor=next_cursor, per_page=size
+    )
 
 
 # ----------------- FEEDBACK (PLACEHOLDER) -----------------
@@ -160,6 +219,10 @@ def feedbacks():
         return redirect(url_for("auth.login"))
 
     license_no = request.args.get("license_no", "").strip()
+    size = page_size()
+    after_sql, after_params = keyset_filter(
+        "f.created_at", "f.id", decode_cursor(request.args.get("after"))
+    )
 
     conn = get_db_connection()
     cur = conn.cursor()
@@ -180,20 +243,134 @@ def feedbacks():
         JOIN hotels h ON f.hotel_id = h.id
     """
 
-    params = []
+    base_query += f" WHERE {after_sql}"
+    params = list(after_params)
 
     if license_no:
-        base_query += " WHERE h.license_number ILIKE %s"
+        base_query += " AND h.license_number ILIKE %s"
         params.append(f"%{license_no}%")
 
-    base_query += " ORDER BY f.created_at DESC"
+    base_query += " ORDER BY f.created_at DESC, f.id DESC"
 
-    cur.execute(base_query, params)
-    feedbacks = cur.fetchall()
+    feedbacks, next_cursor = fetch_page(
+        cur, base_query, params, size, ts_key="created_at"
+    )
 
     cur.close()
     conn.close()
 
     return render_template(
-        "admin/feedbacks.html", feedbacks=feedbacks, license_no=license_no
+        "admin/feedbacks.html",
+        feedbacks=feedbacks,
+        license_no=license_no,
+        next_cursor=next_cursor,
+        per_page=size,
+    )
+
+
+# ----------------- EXPORTS (STREAMED) -----------------
+ORDER_EXPORT_COLUMNS = [
+    "id",
+    "order_time",
+    "hotel_id",
+    "hotel_name",
+    "user_id",
+    "user_name",
+    "total_people",
+    "total_amount",
+    "payment_mode",
+    "order_status",
+    "scheduled_time",
+]
+
+FEEDBACK_EXPORT_COLUMNS = [
+    "id",
+    "created_at",
+    "hotel_id",
+    "hotel_name",
+    "license_number",
+    "user_id",
+    "user_name",
+    "rating",
+    "feedback_text",
+]
+
+
+@admin_bp.route("/export/orders.<fmt>")
+def export_orders(fmt):
+    if not admin_required():
+        return redirect(url_for("auth.login"))
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    where, params = export_filters(request.args, "o.order_time", "o.hotel_id")
+
+    query = f"""
+        SELECT
+            o.id,
+            o.order_time,
+            o.hotel_id,
+            h.hotel_name,
+            o.user_id,
+            u.user_full_name AS user_name,
+            o.total_people,
+            o.total_amount,
+            o.payment_mode,
+            o.order_status,
+            o.scheduled_time
+        FROM orders o
+        JOIN users u ON o.user_id = u.id
+        JOIN hotels h ON o.hotel_id = h.id
+        WHERE {where}
+        ORDER BY o.order_time, o.id
+    """
+
+    return export_response(
+        "orders", stream_rows("orders", query, params, ORDER_EXPORT_COLUMNS, fmt), fmt
+    )
+
+
+@admin_bp.route("/export/feedbacks.<fmt>")
+def export_feedbacks(fmt):
+    if not admin_required():
+        return redirect(url_for("auth.login"))
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    where, params = export_filters(request.args, "f.created_at", "f.hotel_id")
+
+    query = f"""
+        SELECT
+            f.id,
+            f.created_at,
+            f.hotel_id,
+            h.hotel_name,
+            h.license_number,
+            f.user_id,
+            u.user_full_name AS user_name,
+            f.rating,
+            f.feedback_text
+        FROM feedbacks f
+        JOIN users u ON f.user_id = u.id
+        JOIN hotels h ON f.hotel_id = h.id
+        WHERE {where}
+        ORDER BY f.created_at, f.id
+    """
+
+    return export_response(
+        "feedbacks",
+        stream_rows("feedbacks", query, params, FEEDBACK_EXPORT_COLUMNS, fmt),
+        fmt,
+    )
+
+
+def export_response(name, chunks, fmt):
+    return Response(
+        chunks,
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={name}.{fmt}",
+            # Let proxies pass rows through instead of buffering the export
+            "X-Accel-Buffering": "no",
+        },
     )
@@ -2,20 +2,13 @@
 
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from app.models.db import get_db_connection
-import os
+from app.services.analytics import invalidate_dashboard_counts
+from app.services.images import store_upload
 from psycopg2.extras import RealDictCursor
 
 auth_bp = Blueprint("auth", __name__)
 
-# Upload folders
-LICENSE_UPLOAD_FOLDER = "app/static/uploads/licenses"
-PROFILE_UPLOAD_FOLDER = "app/static/uploads/hotel_profiles"
-
-os.makedirs(LICENSE_UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(PROFILE_UPLOAD_FOLDER, exist_ok=True)
-
 
 # ---------------- LOGIN ---------------- (unchanged)
 @auth_bp.route("/login", methods=["GET", "POST"])
@@ -51,18 +44,24 @@ def login():
 
             # 🔥 NEW: GET USER ID IF ROLE IS USER
             user_id = None
+            user_name = None
             if role == "user":
-                cur.execute("SELECT id FROM users WHERE login_id = %s", (login_id,))
+                cur.execute(
+                    "SELECT id, user_full_name FROM users WHERE login_id = %s",
+                    (login_id,),
+                )
                 user = cur.fetchone()
                 if not user:
                     flash("User account not found", "danger")
                     return redirect(url_for("auth.login"))
                 user_id = user["id"]
+                user_name = user["user_full_name"]
 
             # 🔒 HOTEL APPROVAL CHECK
+            hotel_id = None
             if role == "hotel":
                 cur.execute(
-                    "SELECT status FROM hotels WHERE login_id = %s", (login_id,)
+                    "SELECT id, status FROM hotels WHERE login_id = %s", (login_id,)
                 )
                 hotel = cur.fetchone()
                 if not hotel or hotel["status"] != "approved":
@@ -71,13 +70,18 @@ def login():
                         f"Hotel account not approved yet (status: {status})", "warning"
                     )
                     return redirect(url_for("auth.login"))
+                hotel_id = hotel["id"]
 
             # ✅ SET ALL REQUIRED SESSION VALUES
+            # (resolved once here so routes don't look them up per request)
             session.clear()
             session["login_id"] = login_id
             session["role"] = role
             if user_id:
                 session["user_id"] = user_id  # 🔥 THIS FIXES EVERYTHING
+                session["user_name"] = user_name
+            if hotel_id:
+                session["hotel_id"] = hotel_id
 
             flash("Login successful!", "success")
 
@@ -194,16 +198,12 @@ def register():
                     conn.rollback()
                     return redirect(url_for("auth.register"))
 
-                license_filename = secure_filename(license_file.filename)
-                license_path = os.path.join(LICENSE_UPLOAD_FOLDER, license_filename)
-                license_file.save(license_path)
+                license_filename = store_upload(license_file, "licenses")
 
                 profile_file = request.files.get("profile_image")
                 profile_filename = None
                 if profile_file and profile_file.filename:
-                    profile_filename = secure_filename(profile_file.filename)
-                    profile_path = os.path.join(PROFILE_UPLOAD_FOLDER, profile_filename)
-                    profile_file.save(profile_path)
+                    profile_filename = store_upload(profile_file, "hotel_profiles")
 
                 cur.execute(
                     """
@@ -227,6 +227,7 @@ def register():
                 )
 
             conn.commit()
+            invalidate_dashboard_counts()
             flash("Registration successful! Please login.", "success")
             return redirect(url_for("auth.login"))
 
@@ -1,21 +1,53 @@
 # Standard library
-from flask import Blueprint, render_template, request, redirect, session, flash, url_for
-from werkzeug.utils import secure_filename
-import os
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    redirect,
+    flash,
+    url_for,
+    stream_with_context,
+)
 import json
-from app.models.db import get_db_connection
+import queue
+import threading
+from config import Config
+from app.models.db import get_db_connection, release_db_connections
+from app.services.analytics import record_completed_order
+from app.services.identity import (
+    current_hotel_id,
+    has_role,
+    hotel_status,
+    invalidate_user,
+)
+from app.services.images import store_upload
+from app.services.inventory import apply_order_stock
+from app.services.kitchen_queue import apply_local_event, kitchen_orders
+from app.services.menu_cache import invalidate_menu, invalidate_stock
+from app.services.metrics import ORDERS_COMPLETED
+from app.services.order_feed import get_order_feed
+from app.services.reservations import invalidate_hotel_slots
 from psycopg2.extras import RealDictCursor
 
 hotel_bp = Blueprint("hotel", __name__, url_prefix="/hotel")
 
+# Request threads this process lends to open order streams
+_stream_slots = threading.BoundedSemaphore(Config.ORDER_FEED_MAX_STREAMS)
+
 
 def hotel_required():
-    return "login_id" in session and session.get("role") == "hotel"
+    # hotel_id comes from the session; status is a short-lived cached flag
+    if not has_role("hotel"):
+        return False
+    hotel_id = current_hotel_id()
+    return hotel_id is not None and hotel_status(hotel_id) == "approved"
 
 
 @hotel_bp.route("/dashboard")
 def dashboard():
-    if "login_id" not in session or session.get("role") != "hotel":
+    if not hotel_required():
         return redirect(url_for("auth.login"))
 
     conn = get_db_connection()
@@ -25,9 +57,9 @@ def dashboard():
         """
         SELECT id, hotel_name, status, is_open
         FROM hotels
-        WHERE login_id=%s
+        WHERE id=%s
         """,
-        (session["login_id"],),
+        (current_hotel_id(),),
     )
 
     hotel = cur.fetchone()
@@ -43,9 +75,10 @@ def dashboard():
 
 @hotel_bp.route("/toggle-status", methods=["POST"])
 def toggle_status():
-    if "login_id" not in session or session.get("role") != "hotel":
+    if not hotel_required():
         return redirect(url_for("auth.login"))
 
+    hotel_id = current_hotel_id()
     is_open = True if request.form.get("is_open") == "on" else False
 
     conn = get_db_connection()
@@ -55,15 +88,17 @@ def toggle_status():
         """
         UPDATE hotels
         SET is_open=%s, updated_at=NOW()
-        WHERE login_id=%s
+        WHERE id=%s
         """,
-        (is_open, session["login_id"]),
+        (is_open, hotel_id),
     )
 
     conn.commit()
     cur.close()
     conn.close()
 
+    invalidate_menu(hotel_id)
+
     return redirect(url_for("hotel.dashboard"))
 
 
@@ -72,18 +107,12 @@ def feedbacks():
     if not hotel_required():
         return redirect(url_for("auth.login"))
 
+    hotel_id = current_hotel_id()
+
     conn = get_db_connection()
     cur = conn.cursor()
 
     try:
-        cur.execute("SELECT id FROM hotels WHERE login_id = %s", (session["login_id"],))
-        hotel_row = cur.fetchone()
-        if not hotel_row:
-            flash("Hotel account not found.", "danger")
-            return redirect(url_for("auth.login"))
-
-        hotel_id = hotel_row["id"] if isinstance(hotel_row, dict) else hotel_row[0]
-
         cur.execute(
             """
             SELECT
@@ -138,20 +167,11 @@ def menu():
     if not hotel_required():
         return redirect(url_for("auth.login"))
 
+    hotel_id = current_hotel_id()
+
     conn = get_db_connection()
     cur = conn.cursor()
 
-    # Get hotel_id safely
-    cur.execute("SELECT id FROM hotels WHERE login_id=%s", (session["login_id"],))
-    hotel = cur.fetchone()
-
-    if not hotel:
-        cur.close()
-        conn.close()
-        return redirect(url_for("auth.login"))
-
-    hotel_id = hotel["id"]
-
     if request.method == "POST":
         item_name = request.form["item_name"]
         categories = request.form.getlist("category")
@@ -163,10 +183,7 @@ def menu():
         filename = None
 
         if image and image.filename:
-            filename = secure_filename(image.filename)
-            upload_dir = "app/static/uploads/menu"
-            os.makedirs(upload_dir, exist_ok=True)
-            image.save(os.path.join(upload_dir, filename))
+            filename = store_upload(image, "menu")
 
         cur.execute(
             """
@@ -177,6 +194,7 @@ def menu():
             (hotel_id, item_name, category_str, price, qty, filename),
         )
         conn.commit()
+        invalidate_menu(hotel_id)
         flash("Menu item added successfully")
 
         return redirect(url_for("hotel.menu"))
@@ -209,10 +227,7 @@ def update_menu():
     filename = None
 
     if image and image.filename:
-        filename = secure_filename(image.filename)
-        upload_dir = "app/static/uploads/menu"
-        os.makedirs(upload_dir, exist_ok=True)
-        image.save(os.path.join(upload_dir, filename))
+        filename = store_upload(image, "menu")
 
     conn = get_db_connection()
     cur = conn.cursor()
@@ -229,6 +244,7 @@ def update_menu():
                     is_available=%s,
                     image=%s
                 WHERE id=%s
+                RETURNING hotel_id
                 """,
                 (item_name, category_str, price, qty, is_available, filename, menu_id),
             )
@@ -242,11 +258,15 @@ def update_menu():
                     available_quantity=%s,
                     is_available=%s
                 WHERE id=%s
+                RETURNING hotel_id
                 """,
                 (item_name, category_str, price, qty, is_available, menu_id),
             )
+        updated = cur.fetchone()
 
         conn.commit()
+        if updated:
+            invalidate_menu(updated["hotel_id"])
         flash("Menu updated successfully", "success")
 
     except Exception as e:
@@ -272,8 +292,11 @@ def delete_menu():
     cur = conn.cursor()
 
     try:
-        cur.execute("DELETE FROM menus WHERE id=%s", (menu_id,))
+        cur.execute("DELETE FROM menus WHERE id=%s RETURNING hotel_id", (menu_id,))
+        deleted = cur.fetchone()
         conn.commit()
+        if deleted:
+            invalidate_menu(deleted["hotel_id"])
         flash("Menu deleted successfully", "success")
 
     except Exception as e:
@@ -300,95 +323,92 @@ def orders():
 
     phone = request.args.get("phone", "").strip()
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    try:
-        # 1️⃣ Get hotel ID
-        cur.execute("SELECT id FROM hotels WHERE login_id = %s", (session["login_id"],))
-        hotel = cur.fetchone()
-        if not hotel:
-            return redirect(url_for("auth.login"))
-
-        hotel_id = hotel["id"]
-
-        # 2️⃣ Orders query (late_action INCLUDED)
-        query = """
-            SELECT
-                o.id,
-                o.total_people,
-                o.total_amount,
-                o.order_status,
-                o.order_time,
-                o.qr_code,
-                o.items,
-                o.payment_mode,
-                
-                u.id AS user_id,
-                u.user_full_name,
-                u.user_phone,
-                u.is_premium
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            WHERE o.hotel_id = %s
-              AND o.order_status != 'completed'
-        """
-        params = [hotel_id]
+    # Active orders in kitchen priority order (premium / due time / wait)
+    orders_list = kitchen_orders(current_hotel_id(), phone=phone)
 
-        if phone:
-            query += " AND u.user_phone ILIKE %s"
-            params.append(f"%{phone}%")
+    return render_template("hotel/orders.html", orders=orders_list, search_phone=phone)
 
-        query += " ORDER BY o.order_time DESC"
 
-        cur.execute(query, params)
-        rows = cur.fetchall()
-
-        orders_list = []
-
-        # 3️⃣ Prepare data for template
-        for row in rows:
-            raw_items = row["items"]
+# -------------------------------------------------
+# KITCHEN QUEUE (JSON)
+# -------------------------------------------------
+@hotel_bp.route("/orders/queue.json")
+def orders_queue():
+    if not hotel_required():
+        return jsonify({"error": "Unauthorized"}), 401
 
-            # JSONB safe handling
-            if isinstance(raw_items, list):
-                items = raw_items
-            elif isinstance(raw_items, str):
-                try:
-                    items = json.loads(raw_items)
-                except Exception:
-                    items = []
-            else:
-                items = []
+    limit = request.args.get("limit", type=int)
+    queue_orders = kitchen_orders(current_hotel_id(), limit=limit)
 
-            orders_list.append(
+    return jsonify(
+        {
+            "orders": [
                 {
-                    "id": row["id"],
-                    "user_id": row["user_id"],
-                    "full_name": row["user_full_name"],
-                    "phone": row["user_phone"],
-                    "is_premium": row["is_premium"],
-                    "payment_mode": row["payment_mode"],
-                    "total_people": row["total_people"],
-                    "total_amount": row["total_amount"],
-                    "order_status": row["order_status"],
-                    "order_time": (
-                        row["order_time"].strftime("%d %b %Y %I:%M %p")
-                        if row["order_time"]
-                        else "N/A"
-                    ),
-                    "qr_code": row["qr_code"],
-                    "order_items": items,
+                    "position": position,
+                    "id": o["id"],
+                    "priority": o["priority"],
+                    "full_name": o["full_name"],
+                    "is_premium": o["is_premium"],
+                    "order_status": o["order_status"],
+                    "payment_mode": o["payment_mode"],
+                    "total_people": o["total_people"],
+                    "scheduled_time": o["scheduled_time"],
+                    "order_time": o["order_time"],
+                    "items": o["order_items"],
                 }
-            )
+                for position, o in enumerate(queue_orders, start=1)
+            ]
+        }
+    )
 
-        return render_template(
-            "hotel/orders.html", orders=orders_list, search_phone=phone
-        )
 
-    finally:
-        cur.close()
-        conn.close()
+# -------------------------------------------------
+# LIVE ORDER FEED (SERVER-SENT EVENTS)
+# -------------------------------------------------
+@hotel_bp.route("/orders/stream")
+def orders_stream():
+    if not hotel_required():
+        return Response(status=401)
+
+    hotel_id = current_hotel_id()
+
+    # The stream can stay open for hours; don't pin a pooled connection
+    release_db_connections()
+
+    def generate():
+        # Taken here, not in the view, so the finally below always frees it
+        if not _stream_slots.acquire(blocking=False):
+            # Every stream thread is busy: the page reloads itself instead
+            data = {"reload": Config.ORDER_FEED_BUSY_RELOAD}
+            yield f"event: busy\ndata: {json.dumps(data)}\n\n"
+            return
+
+        feed = get_order_feed()
+        events = feed.subscribe(hotel_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = events.get(timeout=Config.ORDER_FEED_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                data = {"order_id": message.get("order_id")}
+                if message.get("order"):
+                    data["html"] = render_template(
+                        "hotel/_order_row.html", o=message["order"]
+                    )
+                yield f"event: {message['event']}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            feed.unsubscribe(hotel_id, events)
+            _stream_slots.release()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # -------------------------------------------------
@@ -417,17 +437,16 @@ def complete_order():
         cur.execute(
             """
             SELECT
-                o.items,
                 TRIM(o.qr_code) AS qr_code,
                 o.hotel_id,
                 o.scheduled_time
             FROM orders o
-            JOIN hotels h ON o.hotel_id = h.id
             WHERE o.id = %s
-              AND h.login_id = %s
-              AND o.order_status != 'completed'
+              AND o.hotel_id = %s
+              AND o.order_status NOT IN ('completed', 'cancelled')
+            FOR UPDATE OF o
             """,
-            (order_id, session["login_id"]),
+            (order_id, current_hotel_id()),
         )
         order = cur.fetchone()
 
@@ -456,27 +475,9 @@ def complete_order():
                 flash("QR code does not match", "danger")
                 return redirect(url_for("hotel.orders"))
 
-        # 4️⃣ Reduce food quantity
+        # 4️⃣ Reduce food quantity (no-op if confirmation already did)
         hotel_id = order["hotel_id"]
-        items = order["items"] or []
-
-        for item in items:
-            item_name = item.get("name", "").strip().lower()
-            qty = int(item.get("qty", 0))
-
-            if not item_name or qty <= 0:
-                continue
-
-            cur.execute(
-                """
-                UPDATE menus
-                SET available_quantity = available_quantity - %s
-                WHERE hotel_id = %s
-                  AND LOWER(TRIM(item_name)) = %s
-                  AND available_quantity >= %s
-                """,
-                (qty, hotel_id, item_name, qty),
-            )
+        apply_order_stock(cur, int(order_id), reason="complete", strict=False)
 
         # 5️⃣ Mark order completed + late flag
         cur.execute(
@@ -489,7 +490,13 @@ def complete_order():
             (is_late, order_id),
         )
 
+        # 6️⃣ Fold into analytics rollups (same transaction)
+        record_completed_order(cur, order_id)
+
         conn.commit()
+        invalidate_stock(hotel_id)
+        apply_local_event("completed", int(order_id), hotel_id)
+        ORDERS_COMPLETED.labels("true" if is_late else "false").inc()
 
         if is_late:
             flash("Order completed (late order – QR skipped)", "warning")
@@ -570,6 +577,8 @@ def report_user():
         )
 
         conn.commit()
+        invalidate_user(user_id)
+        apply_local_event("completed", int(order_id), current_hotel_id())
 
     except Exception as e:
         conn.rollback()
@@ -591,8 +600,8 @@ def profile():
     conn = get_db_connection()
     cur = conn.cursor()
 
-    # Fetch hotel by login_id
-    cur.execute("SELECT * FROM hotels WHERE login_id=%s", (session["login_id"],))
+    # Fetch hotel by id
+    cur.execute("SELECT * FROM hotels WHERE id=%s", (current_hotel_id(),))
     hotel = cur.fetchone()
 
     if not hotel:
@@ -608,15 +617,18 @@ def profile():
         email = request.form["email"]
         address = request.form["address"]
         location = request.form["location"]
+        seating_capacity = max(
+            1, request.form.get("seating_capacity", hotel["seating_capacity"], type=int)
+        )
+        dining_minutes = max(
+            1, request.form.get("dining_minutes", hotel["dining_minutes"], type=int)
+        )
 
         profile_image = request.files.get("profile_image")
         image_filename = hotel.get("profile_image")
 
         if profile_image and profile_image.filename:
-            image_filename = secure_filename(profile_image.filename)
-            upload_dir = "app/static/uploads/hotel_profiles"
-            os.makedirs(upload_dir, exist_ok=True)
-            profile_image.save(os.path.join(upload_dir, image_filename))
+            image_filename = store_upload(profile_image, "hotel_profiles")
 
         cur.execute(
             """
@@ -628,8 +640,10 @@ def profile():
                 address=%s,
                 location=%s,
                 profile_image=%s,
+                seating_capacity=%s,
+                dining_minutes=%s,
                 updated_at=NOW()
-            WHERE login_id=%s
+            WHERE id=%s
             """,
             (
                 hotel_name,
@@ -639,11 +653,15 @@ def profile():
                 address,
                 location,
                 image_filename,
-                session["login_id"],
+                seating_capacity,
+                dining_minutes,
+                hotel["id"],
             ),
         )
 
         conn.commit()
+        invalidate_menu(hotel["id"])
+        invalidate_hotel_slots(hotel["id"])
         flash("Profile updated successfully", "success")
         return redirect(url_for("hotel.profile"))
 
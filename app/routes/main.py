@@ -1,5 +1,7 @@
-from flask import Blueprint, redirect, url_for
-from app.models.db import get_db_connection
+from flask import Blueprint, Response, redirect, url_for
+from app.models.db import get_db_connection, pool_stats
+from app.services.identity import has_role
+from app.services.metrics import render_metrics, scrape_allowed
 
 main_bp = Blueprint("main", __name__)
 
@@ -19,3 +21,20 @@ def db_test():
     cur.close()
     conn.close()
     return {"db_status": "connected", "result": result}
+
+
+@main_bp.route("/db-pool")
+def db_pool():
+    # Pool internals are for operators only
+    if not has_role("admin"):
+        return {"error": "Forbidden"}, 403
+    return {"pool": pool_stats()}
+
+
+@main_bp.route("/metrics")
+def metrics():
+    # Route names and SQL timings are internal; scrapers only
+    if not scrape_allowed():
+        return {"error": "Forbidden"}, 403
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
@@ -8,12 +8,33 @@ from flask import (
     flash,
     request,
     jsonify,  # ✅ REQUIRED
+    Response,
 )
 
 import json
-import os
-import qrcode
 from psycopg2.extras import RealDictCursor
+from app.services.identity import current_user_name, user_is_premium
+from app.services.inventory import apply_order_stock
+from app.services.kitchen_queue import apply_local_event
+from app.services.menu_cache import get_hotel_menu, invalidate_stock
+from app.services.metrics import ORDERS_CONFIRMED, ORDERS_PLACED
+from app.services.reservations import (
+    SlotUnavailable,
+    available_slots,
+    book_slot,
+    cancel_order,
+    index_booking,
+    parse_day,
+)
+from app.services.search import search_hotels
+from app.services.qr import (
+    enqueue_qr,
+    ensure_qr,
+    qr_etag,
+    qr_url,
+    qr_value,
+    render_qr_png,
+)
 
 user_bp = Blueprint("user", __name__, url_prefix="/user")
 
@@ -23,22 +44,7 @@ def dashboard():
     if session.get("role") != "user":
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT user_full_name
-        FROM users
-        WHERE login_id = %s
-    """,
-        (session["login_id"],),
-    )
-
-    user = cur.fetchone()
-
-    cur.close()
-    conn.close()
+    user = {"user_full_name": current_user_name()}
 
     return render_template("user/dashboard.html", user=user)
 
@@ -76,6 +82,7 @@ def profile():
         )
 
         conn.commit()
+        session["user_name"] = full_name
         flash("Profile updated successfully", "success")
         return redirect(url_for("user.profile"))
 
@@ -102,37 +109,23 @@ def hotel_list():
         return redirect(url_for("auth.login"))
 
     search = request.args.get("search", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    query = """
-        SELECT id, hotel_name, location, phone, profile_image
-        FROM hotels
-        WHERE status='approved'
-          AND is_active=TRUE
-          AND is_open=TRUE
-    """
-    params = []
-
-    if search:
-        query += """
-            AND (
-                LOWER(hotel_name) LIKE %s
-                OR LOWER(location) LIKE %s
-            )
-        """
-        params = [f"%{search.lower()}%", f"%{search.lower()}%"]
-
-    query += " ORDER BY hotel_name"
-
-    cur.execute(query, params)
-    hotels = cur.fetchall()
+    hotels, has_next = search_hotels(cur, search, page)
 
     cur.close()
     conn.close()
 
-    return render_template("user/hotels.html", hotels=hotels, search=search)
+    return render_template(
+        "user/hotels.html",
+        hotels=hotels,
+        search=search,
+        page=page,
+        has_next=has_next,
+    )
 
 
 @user_bp.route("/menu/<int:hotel_id>")
@@ -144,47 +137,20 @@ def menu(hotel_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # ✅ Fetch hotel
-    cur.execute(
-        """
-        SELECT id, hotel_name, location
-        FROM hotels
-        WHERE id=%s
-          AND status='approved'
-          AND is_active=TRUE
-          AND is_open=TRUE
-    """,
-        (hotel_id,),
-    )
-    hotel = cur.fetchone()
+    # ✅ Hotel + menus (cached per hotel, stock refreshed on a short TTL)
+    hotel, menus = get_hotel_menu(cur, hotel_id)
 
     if not hotel:
         cur.close()
         conn.close()
         return redirect(url_for("user.hotel_list"))
 
-    # ✅ Fetch menus
-    cur.execute(
-        """
-        SELECT id, item_name, category, price,
-               available_quantity, image
-        FROM menus
-        WHERE hotel_id=%s
-          AND is_available=TRUE
-        ORDER BY category, item_name
-    """,
-        (hotel_id,),
-    )
-    menus = cur.fetchall()
-
-    # ✅ Fetch premium status
-    cur.execute("SELECT is_premium FROM users WHERE id=%s", (session["user_id"],))
-    user_row = cur.fetchone()
-    is_premium = user_row["is_premium"] if user_row else False
-
     cur.close()
     conn.close()
 
+    # ✅ Premium status (short-lived cached flag)
+    is_premium = user_is_premium(session["user_id"])
+
     return render_template(
         "user/menu.html", hotel=hotel, menus=menus, is_premium=is_premium
     )
@@ -206,39 +172,64 @@ def place_order():
     if payment_mode not in ("cod", "online"):
         return jsonify({"success": False, "error": "Invalid payment mode"}), 400
 
+    # Retries / double clicks of one checkout send the same key
+    key = (request.headers.get("Idempotency-Key") or "").strip() or None
+    if key and len(key) > 64:
+        return jsonify({"success": False, "error": "Invalid idempotency key"}), 400
+
+    if key:
+        existing = find_keyed_order(session["user_id"], key)
+        if existing:
+            return replay_order(existing)
+
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        final_items = []
-
+        # Validate the whole cart in one round trip
+        wanted = {}
         for item in data["items"]:
-            cur.execute(
-                "SELECT item_name, price, available_quantity FROM menus WHERE id=%s",
-                (item["menu_id"],),
-            )
-            menu = cur.fetchone()
+            menu_id = int(item["menu_id"])
+            wanted[menu_id] = wanted.get(menu_id, 0) + int(item["qty"])
 
-            if not menu or menu["available_quantity"] < item["qty"]:
-                raise Exception("Item unavailable")
+        cur.execute(
+            """
+            SELECT id, item_name, price, available_quantity
+            FROM menus
+            WHERE id = ANY(%s)
+            """,
+            (list(wanted),),
+        )
+        menus = {row["id"]: row for row in cur.fetchall()}
 
-            final_items.append(
-                {
-                    "menu_id": item["menu_id"],
-                    "name": menu["item_name"],
-                    "qty": item["qty"],
-                    "price": float(menu["price"]),
-                }
-            )
+        for menu_id, qty in wanted.items():
+            menu = menus.get(menu_id)
+            if not menu or qty <= 0 or menu["available_quantity"] < qty:
+                raise Exception("Item unavailable")
 
         order_status = "preparing" if payment_mode == "cod" else "paid"
+        menu_ids = sorted(wanted)
+
+        # orders.items is still written (same lines as order_items) so the
+        # previous release can be rolled back to; see migration 0008
+        legacy_items = [
+            {
+                "menu_id": menu_id,
+                "name": menus[menu_id]["item_name"],
+                "qty": wanted[menu_id],
+                "price": float(menus[menu_id]["price"]),
+            }
+            for menu_id in menu_ids
+        ]
 
         cur.execute(
             """
             INSERT INTO orders
             (user_id, hotel_id, total_people, total_amount,
-             scheduled_time, items, payment_mode, order_status)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+             scheduled_time, items, payment_mode, order_status, idempotency_key)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            ON CONFLICT (user_id, idempotency_key)
+                WHERE idempotency_key IS NOT NULL DO NOTHING
             RETURNING id
             """,
             (
@@ -247,15 +238,54 @@ def place_order():
                 data["total_people"],
                 data["total_amount"],
                 data["scheduled_time"],
-                json.dumps(final_items),
+                json.dumps(legacy_items),
                 payment_mode,
                 order_status,
+                key,
             ),
         )
+        row = cur.fetchone()
+
+        # No row: a concurrent request with the same key won the insert
+        order_id = row["id"] if row else None
+        if order_id:
+            # All cart lines in one statement
+            cur.execute(
+                """
+                INSERT INTO order_items (order_id, menu_id, item_name, qty, unit_price)
+                SELECT %s, *
+                FROM unnest(%s::int[], %s::varchar[], %s::int[], %s::numeric[])
+                """,
+                (
+                    order_id,
+                    menu_ids,
+                    [menus[menu_id]["item_name"] for menu_id in menu_ids],
+                    [wanted[menu_id] for menu_id in menu_ids],
+                    [menus[menu_id]["price"] for menu_id in menu_ids],
+                ),
+            )
+
+            # Seats are taken in the same transaction as the order
+            people = int(data["total_people"])
+            booked = book_slot(
+                cur, order_id, data["hotel_id"], data["scheduled_time"], people
+            )
+
+            # COD is confirmed in the same transaction: a stock shortfall
+            # rolls back the order and its table together
+            if payment_mode == "cod":
+                confirm_order(cur, order_id)
 
-        order_id = cur.fetchone()["id"]
         conn.commit()
 
+        if order_id:
+            index_booking(data["hotel_id"], booked, people)
+            apply_local_event("placed", order_id, int(data["hotel_id"]))
+            ORDERS_PLACED.labels(payment_mode).inc()
+
+    except SlotUnavailable as e:
+        conn.rollback()
+        return jsonify({"success": False, "error": str(e)}), 409
     except Exception as e:
         conn.rollback()
         print("ORDER ERROR:", e)
@@ -264,9 +294,31 @@ def place_order():
         cur.close()
         conn.close()
 
-    # COD → confirm immediately
+    if order_id is None:
+        return replay_order(find_keyed_order(session["user_id"], key))
+
     if payment_mode == "cod":
+        order_confirmed(order_id, int(data["hotel_id"]))
+
+    return placed_order_response(order_id, payment_mode)
+
+
+def confirm_placed_order(order_id):
+    # Error response if confirmation failed (it has already rolled back and
+    # logged). The order is then cancelled, so it holds no table and never
+    # reaches the kitchen unconfirmed.
+    try:
         process_confirmed_order(order_id)
+    except Exception:
+        hotel_id = cancel_order(order_id)
+        if hotel_id is not None:
+            apply_local_event("cancelled", order_id, hotel_id)
+        return jsonify({"success": False, "error": "Server error"}), 500
+    return None
+
+
+def placed_order_response(order_id, payment_mode):
+    if payment_mode == "cod":
         return jsonify(
             {
                 "success": True,
@@ -283,6 +335,67 @@ def place_order():
     )
 
 
+# --------------------------------------------------
+# TABLE AVAILABILITY
+# --------------------------------------------------
+@user_bp.route("/slots/<int:hotel_id>")
+def slots(hotel_id):
+    if session.get("role") != "user":
+        return jsonify({"error": "Unauthorized"}), 401
+
+    day = parse_day(request.args.get("date"))
+    people = request.args.get("people", 1, type=int)
+    if day is None or people < 1:
+        return jsonify({"error": "date (YYYY-MM-DD) and people are required"}), 400
+
+    starts = available_slots(hotel_id, day, people)
+    if starts is None:
+        return jsonify({"error": "Hotel not found"}), 404
+
+    return jsonify(
+        {
+            "date": day.isoformat(),
+            "people": people,
+            "slots": [s.strftime("%H:%M") for s in starts],
+        }
+    )
+
+
+# --------------------------------------------------
+# IDEMPOTENT RETRIES
+# --------------------------------------------------
+def find_keyed_order(user_id, key):
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+
+    try:
+        cur.execute(
+            """
+            SELECT id, payment_mode, qr_code, order_status
+            FROM orders
+            WHERE user_id = %s AND idempotency_key = %s
+            """,
+            (user_id, key),
+        )
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def replay_order(order):
+    # Same response as the first attempt, without new writes. A COD order
+    # placed before confirmation moved into place_order's transaction, whose
+    # first attempt died before confirming, is confirmed now.
+    if order["order_status"] == "cancelled":
+        return jsonify({"success": False, "error": "Order cancelled"}), 409
+    if order["payment_mode"] == "cod" and not order["qr_code"]:
+        failed = confirm_placed_order(order["id"])
+        if failed:
+            return failed
+    return placed_order_response(order["id"], order["payment_mode"])
+
+
 # --------------------------------------------------
 # ONLINE PAYMENT PAGE (SIMULATED)
 # --------------------------------------------------
@@ -302,7 +415,33 @@ def payment_success(order_id):
     if session.get("role") != "user":
         return redirect(url_for("auth.login"))
 
-    process_confirmed_order(order_id)
+    # The order id is this callback's idempotency key: a repeat for an
+    # order that is already confirmed takes no lock and writes nothing
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(
+            "SELECT qr_code, order_status FROM orders WHERE id=%s AND user_id=%s",
+            (order_id, session.get("user_id")),
+        )
+        order = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+    if not order:
+        return "Order not found", 404
+
+    if not order["qr_code"] and order["order_status"] == "cancelled":
+        # Payment window passed; the table was released (orders-expire)
+        return "Order expired", 410
+
+    if not order["qr_code"]:
+        # Already rolled back and logged; same response as the ASGI route
+        try:
+            process_confirmed_order(order_id)
+        except Exception:
+            return "Order confirmation failed", 500
 
     return redirect(url_for("user.order_success", order_id=order_id))
 
@@ -315,16 +454,26 @@ def process_confirmed_order(order_id):
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     try:
-        cur.execute("SELECT items FROM orders WHERE id=%s", (order_id,))
-        items = cur.fetchone()["items"]
+        cur.execute(
+            """
+            SELECT hotel_id, qr_code, order_status
+            FROM orders
+            WHERE id=%s
+            FOR UPDATE
+            """,
+            (order_id,),
+        )
+        order = cur.fetchone()
 
-        for item in items:
-            cur.execute(
-                "UPDATE menus SET available_quantity = available_quantity - %s WHERE id=%s",
-                (item["qty"], item["menu_id"]),
-            )
+        if order["qr_code"]:
+            # Confirmed by a concurrent retry while we waited for the lock
+            conn.rollback()
+            return False
+
+        if order["order_status"] == "cancelled":
+            raise Exception("Order expired")
 
-        generate_and_save_qr(order_id, cur)
+        confirm_order(cur, order_id)
         conn.commit()
 
     except Exception as e:
@@ -335,32 +484,32 @@ def process_confirmed_order(order_id):
         cur.close()
         conn.close()
 
+    order_confirmed(order_id, order["hotel_id"])
+    return True
 
-# --------------------------------------------------
-# QR GENERATION
-# --------------------------------------------------
-def generate_and_save_qr(order_id, cur):
-    qr_value = f"ORDER_ID:{order_id}"
-
-    qr_dir = os.path.join("app", "static", "uploads", "qrcodes")
-    os.makedirs(qr_dir, exist_ok=True)
 
-    filename = f"order_{order_id}.png"
-    path = os.path.join(qr_dir, filename)
-
-    qrcode.make(qr_value).save(path)
+def confirm_order(cur, order_id):
+    # Inside the caller's transaction; raises on a stock shortfall
+    apply_order_stock(cur, order_id, reason="confirm")
 
+    # QR text is needed for verification. The image URL is fixed (the PNG
+    # is rendered on request), so it is stored now and pages never wait
     cur.execute(
-        """
-        UPDATE orders
-        SET qr_code=%s,
-            qr_image_url=%s
-        WHERE id=%s
-        """,
-        (qr_value, f"/static/uploads/qrcodes/{filename}", order_id),
+        "UPDATE orders SET qr_code=%s, qr_image_url=%s WHERE id=%s",
+        (qr_value(order_id), qr_url(order_id), order_id),
     )
 
 
+def order_confirmed(order_id, hotel_id):
+    # After the confirming transaction has committed
+    ORDERS_CONFIRMED.inc()
+    invalidate_stock(hotel_id)
+    apply_local_event("confirmed", order_id, hotel_id)
+
+    # Render outside the transaction so no locks are held meanwhile
+    enqueue_qr(order_id)
+
+
 # --------------------------------------------------
 # COMMON SUCCESS PAGE (COD + ONLINE)
 # --------------------------------------------------
@@ -369,26 +518,75 @@ def order_success(order_id):
     if session.get("role") != "user":
         return redirect(url_for("auth.login"))
 
+    order = fetch_order_qr(order_id, session.get("user_id"))
+    if not order or not order["qr_code"]:
+        return "QR not available", 404
+
+    # The image route renders on request, so a confirmed order's URL works
+    # at once (even if the stored column predates this)
+    return render_template(
+        "user/order_success.html",
+        order_id=order_id,
+        qr_url=order["qr_image_url"] or qr_url(order_id),
+    )
+
+
+@user_bp.route("/order-qr/<int:order_id>")
+def order_qr_status(order_id):
+    if session.get("role") != "user":
+        return jsonify({"ready": False, "error": "Unauthorized"}), 401
+
+    order = fetch_order_qr(order_id, session.get("user_id"))
+    if not order:
+        return jsonify({"ready": False, "error": "Order not found"}), 404
+
+    if order["qr_code"] and not order["qr_image_url"]:
+        order["qr_image_url"] = ensure_qr(order_id)
+
+    return jsonify(
+        {"ready": bool(order["qr_image_url"]), "qr_url": order["qr_image_url"]}
+    )
+
+
+# --------------------------------------------------
+# QR IMAGE (RENDERED ON DEMAND, CACHED IN MEMORY)
+# --------------------------------------------------
+@user_bp.route("/qr/<int:order_id>.png")
+def order_qr_image(order_id):
+    if session.get("role") != "user":
+        return redirect(url_for("auth.login"))
+
+    # Only the owner's confirmed orders render; other ids never reach the
+    # process-wide PNG cache
+    order = fetch_order_qr(order_id, session.get("user_id"))
+    if not order or not order["qr_code"]:
+        return "QR not available", 404
+
+    etag = qr_etag(order_id)
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+
+    return Response(render_qr_png(order_id), mimetype="image/png", headers=headers)
+
+
+def fetch_order_qr(order_id, user_id):
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
     cur.execute(
-        "SELECT qr_image_url FROM orders WHERE id=%s",
-        (order_id,),
+        "SELECT qr_code, qr_image_url FROM orders WHERE id=%s AND user_id=%s",
+        (order_id, user_id),
     )
     order = cur.fetchone()
 
     cur.close()
     conn.close()
-
-    if not order or not order["qr_image_url"]:
-        return "QR not available", 404
-
-    return render_template(
-        "user/order_success.html",
-        order_id=order_id,
-        qr_url=order["qr_image_url"],
-    )
+    return order
 
 
 # ---------------- USER MY ORDERS (VIEW) ----------------
@@ -397,22 +595,12 @@ def my_orders():
     if "login_id" not in session or session.get("role") != "user":
         return redirect(url_for("auth.login"))
 
-    login_id = session["login_id"]
+    # User identity comes from the session (resolved at login)
+    user = {"id": session["user_id"], "user_full_name": current_user_name()}
 
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Fetch user
-    cur.execute(
-        """
-        SELECT id, user_full_name
-        FROM users
-        WHERE login_id = %s
-        """,
-        (login_id,),
-    )
-    user = cur.fetchone()
-
     # Fetch orders (active + completed without feedback)
     cur.execute(
         """
@@ -429,7 +617,7 @@ def my_orders():
         JOIN hotels h ON h.id = o.hotel_id
         WHERE o.user_id = %s
           AND (
-                o.order_status != 'completed'
+                o.order_status NOT IN ('completed', 'cancelled')
                 OR (o.order_status = 'completed' AND o.feedback_given = false)
               )
         ORDER BY o.created_at DESC
@@ -0,0 +1,237 @@
+from datetime import date, timedelta
+
+import click
+from config import Config
+from app.models.db import get_db_connection
+from app.services.cache import LRUCache
+
+# Rollups are keyed by when the customer dines (scheduled_time), falling
+# back to when the order was placed.
+BOOKING_TIME = "COALESCE(o.scheduled_time, o.order_time)"
+
+# Completions hold this advisory lock shared and a rebuild holds it
+# exclusively, so an order completed mid-rebuild is counted exactly once:
+# either the rebuild sees it committed, or its increment waits for the
+# rebuild to commit.
+ROLLUP_LOCK_ID = 74230002
+
+
+# ---------------- INCREMENTAL UPDATE ----------------
+def record_completed_order(cur, order_id):
+    """Fold one completed order into the rollups (same transaction)."""
+    cur.execute("SELECT pg_advisory_xact_lock_shared(%s)", (ROLLUP_LOCK_ID,))
+    cur.execute(
+        f"""
+        INSERT INTO analytics_hotel_hourly
+            (hotel_id, day, hour, orders, covers, revenue)
+        SELECT
+            o.hotel_id,
+            {BOOKING_TIME}::date,
+            EXTRACT(HOUR FROM {BOOKING_TIME})::int,
+            1,
+            COALESCE(o.total_people, 0),
+            COALESCE(o.total_amount, 0)
+        FROM orders o
+        WHERE o.id = %s
+        ON CONFLICT (hotel_id, day, hour) DO UPDATE
+        SET orders = analytics_hotel_hourly.orders + EXCLUDED.orders,
+            covers = analytics_hotel_hourly.covers + EXCLUDED.covers,
+            revenue = analytics_hotel_hourly.revenue + EXCLUDED.revenue
+        """,
+        (order_id,),
+    )
+
+    cur.execute(
+        f"""
+        INSERT INTO analytics_dish_daily
+            (hotel_id, menu_id, day, item_name, quantity, revenue)
+        SELECT
+            o.hotel_id,
+            oi.menu_id,
+            {BOOKING_TIME}::date,
+            MAX(oi.item_name),
+            SUM(oi.qty),
+            SUM(oi.qty * oi.unit_price)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.id = %s
+        GROUP BY o.hotel_id, oi.menu_id, {BOOKING_TIME}::date
+        ON CONFLICT (hotel_id, menu_id, day) DO UPDATE
+        SET quantity = analytics_dish_daily.quantity + EXCLUDED.quantity,
+            revenue = analytics_dish_daily.revenue + EXCLUDED.revenue,
+            item_name = EXCLUDED.item_name
+        """,
+        (order_id,),
+    )
+
+
+# ---------------- FULL REBUILD ----------------
+def rebuild_rollups(cur):
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (ROLLUP_LOCK_ID,))
+    cur.execute("TRUNCATE analytics_hotel_hourly, analytics_dish_daily")
+
+    cur.execute(
+        f"""
+        INSERT INTO analytics_hotel_hourly
+            (hotel_id, day, hour, orders, covers, revenue)
+        SELECT
+            o.hotel_id,
+            {BOOKING_TIME}::date,
+            EXTRACT(HOUR FROM {BOOKING_TIME})::int,
+            COUNT(*),
+            COALESCE(SUM(o.total_people), 0),
+            COALESCE(SUM(o.total_amount), 0)
+        FROM orders o
+        WHERE o.order_status = 'completed'
+        GROUP BY 1, 2, 3
+        """
+    )
+
+    cur.execute(
+        f"""
+        INSERT INTO analytics_dish_daily
+            (hotel_id, menu_id, day, item_name, quantity, revenue)
+        SELECT
+            o.hotel_id,
+            oi.menu_id,
+            {BOOKING_TIME}::date,
+            MAX(oi.item_name),
+            SUM(oi.qty),
+            SUM(oi.qty * oi.unit_price)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.order_status = 'completed'
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+# ---------------- DASHBOARD COUNTERS ----------------
+# Served from a per-process TTL cache. Writes in this process invalidate it
+# immediately; other workers pick changes up within DASHBOARD_CACHE_TTL.
+_counts_cache = LRUCache(maxsize=1, ttl=Config.DASHBOARD_CACHE_TTL)
+
+
+def dashboard_counts():
+    counts = _counts_cache.get("counts")
+    if counts is not None:
+        return counts
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            """
+            SELECT
+                COUNT(*) AS total_hotels,
+                COUNT(*) FILTER (WHERE status = 'pending') AS pending_hotels,
+                (SELECT COUNT(*) FROM users) AS total_users
+            FROM hotels
+            """
+        )
+        counts = dict(cur.fetchone())
+    finally:
+        cur.close()
+        conn.close()
+
+    _counts_cache.set("counts", counts)
+    return counts
+
+
+def invalidate_dashboard_counts():
+    _counts_cache.clear()
+
+
+# ---------------- DASHBOARD QUERIES ----------------
+def dashboard_analytics(days=30, limit=10):
+    since = date.today() - timedelta(days=days)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            """
+            SELECT
+                d.menu_id,
+                MAX(d.item_name) AS item_name,
+                h.hotel_name,
+                SUM(d.quantity) AS quantity,
+                SUM(d.revenue) AS revenue
+            FROM analytics_dish_daily d
+            JOIN hotels h ON h.id = d.hotel_id
+            WHERE d.day >= %s
+            GROUP BY d.menu_id, h.hotel_name
+            ORDER BY quantity DESC
+            LIMIT %s
+            """,
+            (since, limit),
+        )
+        top_dishes = cur.fetchall()
+
+        cur.execute(
+            """
+            SELECT hour, SUM(orders) AS orders, SUM(covers) AS covers
+            FROM analytics_hotel_hourly
+            WHERE day >= %s
+            GROUP BY hour
+            ORDER BY hour
+            """,
+            (since,),
+        )
+        peak_hours = cur.fetchall()
+
+        cur.execute(
+            """
+            SELECT
+                h.id AS hotel_id,
+                h.hotel_name,
+                SUM(a.orders) AS orders,
+                SUM(a.covers) AS covers,
+                SUM(a.revenue) AS revenue
+            FROM analytics_hotel_hourly a
+            JOIN hotels h ON h.id = a.hotel_id
+            WHERE a.day >= %s
+            GROUP BY h.id, h.hotel_name
+            ORDER BY revenue DESC
+            LIMIT %s
+            """,
+            (since, limit),
+        )
+        hotel_performance = cur.fetchall()
+
+    finally:
+        cur.close()
+        conn.close()
+
+    return {
+        "days": days,
+        "top_dishes": top_dishes,
+        "peak_hours": peak_hours,
+        "hotel_performance": hotel_performance,
+    }
+
+
+# ---------------- CLI ----------------
+@click.command("analytics-rebuild")
+def analytics_rebuild_command():
+    """Recompute analytics rollups from all completed orders."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        rebuild_rollups(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    click.echo("Analytics rollups rebuilt.")
+
+
+def init_app(app):
+    app.cli.add_command(analytics_rebuild_command)
@@ -0,0 +1,237 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+import click
+from flask import abort, request, send_from_directory, url_for
+
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # gzip-only when the brotli wheel is unavailable
+    brotli = None
+
+# ---------------- STATIC ASSET PIPELINE ----------------
+# CSS/JS under app/static are minified, concatenated into bundles and
+# written to app/static/dist as <name>.<hash>.<ext> with .gz/.br copies.
+# manifest.json maps bundle names to the fingerprinted files; templates ask
+# for {{ asset_url("css/login.css") }} and get /assets/login.<hash>.css,
+# served with a one-year immutable Cache-Control and the best encoding the
+# browser accepts. Bundles are built by `flask assets-build` in the deploy
+# step (at startup only in debug); the previous ASSETS_KEEP_BUILDS builds
+# stay in dist so pages rendered before a deploy keep loading.
+
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+DIST_DIR = os.path.join(STATIC_ROOT, "dist")
+MANIFEST = os.path.join(DIST_DIR, "manifest.json")
+
+SOURCE_DIRS = ("css", "js")
+
+# Bundles built from several sources (name -> sources in load order). Every
+# other css/js file is bundled on its own under its source path.
+BUNDLES = {}
+
+# Preferred first when the client weighs them equally
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# <stem>.<12 hex digits>.<ext>, as written by build_bundle()
+FINGERPRINTED = re.compile(r"^(.+)\.([0-9a-f]{12})(\.css|\.js)$")
+
+
+# ---------------- MINIFY ----------------
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    # Whitespace before ":" is left alone (".a :hover" != ".a:hover")
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def strip_js_whitespace(text):
+    # Not a minifier: comments are kept (a "//" may sit inside a string),
+    # only indentation and blank lines go
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+MINIFIERS = {".css": minify_css, ".js": strip_js_whitespace}
+
+
+# ---------------- BUILD ----------------
+def bundle_sources():
+    bundles = {}
+    for folder in SOURCE_DIRS:
+        path = os.path.join(STATIC_ROOT, folder)
+        if not os.path.isdir(path):
+            continue
+        for filename in sorted(os.listdir(path)):
+            if os.path.splitext(filename)[1] in MINIFIERS:
+                name = f"{folder}/{filename}"
+                bundles[name] = [name]
+    bundles.update(BUNDLES)
+    return bundles
+
+
+def write_file(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_bundle(name, sources):
+    ext = os.path.splitext(name)[1]
+    parts = []
+    for source in sources:
+        with open(os.path.join(STATIC_ROOT, source), encoding="utf-8") as f:
+            parts.append(MINIFIERS[ext](f.read()))
+    data = "\n".join(parts).encode("utf-8")
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    filename = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+    path = os.path.join(DIST_DIR, filename)
+
+    # Same content -> same name, so unchanged bundles are not rewritten
+    if not os.path.exists(path):
+        write_file(path, data)
+        write_file(path + ".gz", gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            write_file(path + ".br", brotli.compress(data, quality=11))
+    else:
+        # Marks it as the newest build for prune()
+        os.utime(path)
+    return filename
+
+
+def output_files():
+    """Fingerprinted bundle files in dist (not their .gz/.br copies)."""
+    if not os.path.isdir(DIST_DIR):
+        return []
+    return [
+        filename for filename in os.listdir(DIST_DIR) if FINGERPRINTED.match(filename)
+    ]
+
+
+def prune(keep):
+    # Per bundle, the newest ``keep`` outputs stay; older ones (and their
+    # compressed copies) are removed
+    builds = {}
+    for filename in output_files():
+        stem, _, ext = FINGERPRINTED.match(filename).groups()
+        builds.setdefault((stem, ext), []).append(filename)
+
+    for filenames in builds.values():
+        filenames.sort(
+            key=lambda f: os.path.getmtime(os.path.join(DIST_DIR, f)), reverse=True
+        )
+        for filename in filenames[keep:]:
+            for suffix in ("",) + tuple(suffix for _, suffix in ENCODINGS):
+                try:
+                    os.remove(os.path.join(DIST_DIR, filename + suffix))
+                except FileNotFoundError:
+                    pass
+
+
+def build(keep=None):
+    """Build every bundle and write the manifest; returns it."""
+    if keep is None:
+        keep = Config.ASSETS_KEEP_BUILDS
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {
+        name: build_bundle(name, sources) for name, sources in bundle_sources().items()
+    }
+    write_file(MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    prune(max(keep, 1))
+    return manifest
+
+
+def is_stale():
+    if not os.path.exists(MANIFEST):
+        return True
+    built = os.path.getmtime(MANIFEST)
+    return any(
+        os.path.getmtime(os.path.join(STATIC_ROOT, source)) > built
+        for sources in bundle_sources().values()
+        for source in sources
+    )
+
+
+_manifest = {}
+_outputs = set()  # servable files: this build and the retained older ones
+
+
+def load_manifest(auto_build=False):
+    global _manifest, _outputs
+
+    if auto_build and is_stale():
+        _manifest = build()
+    else:
+        try:
+            with open(MANIFEST) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print("ASSET MANIFEST ERROR:", e)
+            _manifest = {}
+    _outputs = set(output_files())
+    return _manifest
+
+
+def pick_encoding(filename):
+    """Best (encoding, file on disk) the client accepts for ``filename``."""
+    best, best_q = (None, filename), 0
+    for name, suffix in ENCODINGS:
+        q = request.accept_encodings.quality(name)
+        if q > best_q and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+            best, best_q = (name, filename + suffix), q
+    return best
+
+
+# ---------------- SERVE ----------------
+def asset_url(name):
+    filename = _manifest.get(name)
+    if filename is None:
+        # Not built: fall back to the plain static file
+        return url_for("static", filename=name)
+    return url_for("asset", filename=filename)
+
+
+def serve_asset(filename):
+    if filename not in _outputs:
+        abort(404)
+
+    # Precompressed copy for the best encoding the client accepts
+    encoding, filename_on_disk = pick_encoding(filename)
+
+    response = send_from_directory(
+        DIST_DIR,
+        filename_on_disk,
+        mimetype="text/css" if filename.endswith(".css") else "text/javascript",
+        max_age=Config.ASSETS_CACHE_MAX_AGE,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
+
+
+# ---------------- CLI ----------------
+@click.command("assets-build")
+def assets_build_command():
+    """Minify, bundle, fingerprint and precompress static CSS/JS."""
+    manifest = build()
+    click.echo(f"Built {len(manifest)} bundles into {DIST_DIR}")
+
+
+def init_app(app):
+    # Production builds in the deploy step; a debug server rebuilds itself
+    auto_build = app.config.get("ASSETS_AUTO_BUILD")
+    load_manifest(app.debug if auto_build is None else auto_build)
+    app.add_url_rule("/assets/<path:filename>", "asset", serve_asset)
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.cli.add_command(assets_build_command)
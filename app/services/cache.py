@@ -0,0 +1,102 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+_MISSING = object()
+
+
+# ---------------- IN-PROCESS LRU / TTL CACHE ----------------
+class LRUCache:
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ---------------- SHARED (REDIS) BACKEND ----------------
+class RedisCache:
+    """Same interface as LRUCache, shared by every worker process.
+
+    Errors are logged and treated as misses so a cache outage never takes
+    the site down with it.
+    """
+
+    def __init__(self, url, prefix, ttl=None):
+        import redis  # optional dependency, only needed when configured
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key, default=None):
+        try:
+            raw = self._client.get(self._key(key))
+        except Exception as e:
+            print("CACHE GET ERROR:", e)
+            return default
+        return default if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            self._client.set(self._key(key), pickle.dumps(value), ex=ttl or None)
+        except Exception as e:
+            print("CACHE SET ERROR:", e)
+
+    def delete(self, key):
+        try:
+            self._client.delete(self._key(key))
+        except Exception as e:
+            print("CACHE DELETE ERROR:", e)
+
+    def clear(self):
+        try:
+            for key in self._client.scan_iter(match=f"{self.prefix}*"):
+                self._client.delete(key)
+        except Exception as e:
+            print("CACHE CLEAR ERROR:", e)
+
+
+def make_cache(name, maxsize, ttl=None):
+    if Config.CACHE_REDIS_URL:
+        return RedisCache(Config.CACHE_REDIS_URL, prefix=f"rrp:{name}:", ttl=ttl)
+    return LRUCache(maxsize, ttl)
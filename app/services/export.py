@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from psycopg2.extras import RealDictCursor
+from config import Config
+from app.models.db import get_db_connection
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# ---------------- FILTERS ----------------
+def export_filters(args, ts_col, hotel_col):
+    """Build a WHERE clause from ?from=YYYY-MM-DD&to=YYYY-MM-DD&hotel_id=N."""
+    conditions = []
+    params = []
+
+    start = _parse_date(args.get("from"))
+    if start:
+        conditions.append(f"{ts_col} >= %s")
+        params.append(start)
+
+    end = _parse_date(args.get("to"))
+    if end:
+        # "to" is inclusive of the whole day
+        conditions.append(f"{ts_col} < %s")
+        params.append(end + timedelta(days=1))
+
+    hotel_id = args.get("hotel_id", type=int)
+    if hotel_id:
+        conditions.append(f"{hotel_col} = %s")
+        params.append(hotel_id)
+
+    return " AND ".join(conditions) or "TRUE", params
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+# ---------------- STREAMING ----------------
+def stream_rows(name, query, params, columns, fmt):
+    """Yield encoded chunks for ``query`` using a server-side cursor.
+
+    Rows are pulled from PostgreSQL ``EXPORT_BATCH_SIZE`` at a time, so
+    memory stays flat regardless of how many rows match.
+    """
+    conn = get_db_connection(scoped=False)
+    cur = conn.cursor(name=f"export_{name}", cursor_factory=RealDictCursor)
+    cur.itersize = Config.EXPORT_BATCH_SIZE
+
+    try:
+        cur.execute(query, params)
+
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(columns)
+
+            while True:
+                rows = cur.fetchmany(Config.EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    writer.writerow([row[c] for c in columns])
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+
+            yield buf.getvalue()
+        else:
+            while True:
+                rows = cur.fetchmany(Config.EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                yield "".join(
+                    json.dumps({c: row[c] for c in columns}, default=str) + "\n"
+                    for row in rows
+                )
+
+    finally:
+        cur.close()
+        conn.close()
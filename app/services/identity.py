@@ -0,0 +1,78 @@
+from flask import session
+from config import Config
+from app.models.db import get_db_connection
+from app.services.cache import make_cache
+
+# Stable identity (ids, display name) is resolved once at login and kept
+# in the session. Flags an admin or hotel can change underneath a live
+# session are cached briefly instead, so revocations still land quickly.
+_flags = make_cache("identity", Config.IDENTITY_CACHE_SIZE, Config.IDENTITY_CACHE_TTL)
+
+
+def has_role(role):
+    return "login_id" in session and session.get("role") == role
+
+
+# ---------------- SESSION IDENTITY ----------------
+def current_hotel_id():
+    hotel_id = session.get("hotel_id")
+    if hotel_id is None and has_role("hotel"):
+        # Sessions created before hotel_id was stored at login
+        row = _fetch_one(
+            "SELECT id FROM hotels WHERE login_id = %s", (session["login_id"],)
+        )
+        if row:
+            hotel_id = session["hotel_id"] = row["id"]
+    return hotel_id
+
+
+def current_user_name():
+    name = session.get("user_name")
+    if name is None and has_role("user"):
+        row = _fetch_one(
+            "SELECT user_full_name FROM users WHERE login_id = %s",
+            (session["login_id"],),
+        )
+        if row:
+            name = session["user_name"] = row["user_full_name"]
+    return name
+
+
+# ---------------- CACHED FLAGS ----------------
+def user_is_premium(user_id):
+    key = f"premium:{user_id}"
+    value = _flags.get(key)
+    if value is None:
+        row = _fetch_one("SELECT is_premium FROM users WHERE id = %s", (user_id,))
+        value = bool(row and row["is_premium"])
+        _flags.set(key, value)
+    return value
+
+
+def hotel_status(hotel_id):
+    key = f"hotel_status:{hotel_id}"
+    value = _flags.get(key)
+    if value is None:
+        row = _fetch_one("SELECT status FROM hotels WHERE id = %s", (hotel_id,))
+        value = row["status"] if row else ""
+        _flags.set(key, value)
+    return value
+
+
+def invalidate_user(user_id):
+    _flags.delete(f"premium:{user_id}")
+
+
+def invalidate_hotel(hotel_id):
+    _flags.delete(f"hotel_status:{hotel_id}")
+
+
+def _fetch_one(query, params):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(query, params)
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import request, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+from werkzeug.utils import secure_filename
+
+from config import Config
+
+# ---------------- UPLOAD PIPELINE ----------------
+# Uploads are stored under content-hash names (<sha256[:20]>.<ext>), so the
+# same photo uploaded twice is kept once and every URL is safe to cache
+# forever. Resized JPEG/WebP variants (<hash>_<width>.<fmt>) are rendered
+# by a background pool; until they exist templates fall back to the original.
+
+UPLOAD_ROOT = os.path.join("app", "static", "uploads")
+
+# Widths rendered per upload folder; folders not listed (licenses) keep
+# only the original
+VARIANT_WIDTHS = {
+    "menu": (160, 480),
+    "hotel_profiles": (160, 640),
+}
+VARIANT_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+
+HASHED_NAME = re.compile(r"^[0-9a-f]{20}(_\d+)?\.[a-z0-9]+$")
+VARIANT_NAME = re.compile(r"_\d+\.(webp|jpg)$")
+
+
+def upload_dir(kind):
+    path = os.path.join(UPLOAD_ROOT, kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def variant_name(filename, width, fmt):
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}_{width}.{fmt}"
+
+
+def temp_path(path):
+    # Written beside the target, then renamed into place, so readers never
+    # see a partial file
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def store_upload(file, kind):
+    """Save an uploaded file under its content hash; returns the filename.
+
+    Variants are queued for rendering, so the request only pays for one
+    hash and (for new content) one write.
+    """
+    data = file.read()
+    ext = os.path.splitext(secure_filename(file.filename or ""))[1].lower() or ".bin"
+    if ext == ".jpeg":
+        ext = ".jpg"
+
+    filename = hashlib.sha256(data).hexdigest()[:20] + ext
+    path = os.path.join(upload_dir(kind), filename)
+
+    if not os.path.exists(path):
+        tmp = temp_path(path)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    if kind in VARIANT_WIDTHS:
+        queue_variants(kind, filename)
+
+    return filename
+
+
+def queue_variants(kind, filename):
+    key = (kind, filename)
+    with _workers_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    get_image_workers().submit(render_variants, kind, filename)
+
+
+def render_variants(kind, filename):
+    folder = upload_dir(kind)
+    try:
+        with Image.open(os.path.join(folder, filename)) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+            for width in VARIANT_WIDTHS[kind]:
+                resized = img.copy()
+                resized.thumbnail((width, width * 4), Image.LANCZOS)
+
+                for fmt, pil_format in VARIANT_FORMATS.items():
+                    path = os.path.join(folder, variant_name(filename, width, fmt))
+                    if os.path.exists(path):
+                        continue
+                    out = resized.convert("RGB") if fmt == "jpg" else resized
+                    tmp = temp_path(path)
+                    out.save(
+                        tmp,
+                        pil_format,
+                        quality=Config.IMAGE_QUALITY,
+                        optimize=True,
+                    )
+                    os.replace(tmp, path)
+
+    except (UnidentifiedImageError, OSError) as e:
+        print("IMAGE VARIANT ERROR:", kind, filename, e)
+    finally:
+        with _workers_lock:
+            _pending.discard((kind, filename))
+
+
+_workers = None
+_workers_pid = None
+_workers_lock = threading.Lock()
+_pending = set()  # (kind, filename) queued or rendering in this process
+
+
+def get_image_workers():
+    global _workers, _workers_pid
+
+    # Threads do not survive fork, so each worker process starts its own
+    with _workers_lock:
+        if _workers is None or _workers_pid != os.getpid():
+            _workers = ThreadPoolExecutor(
+                max_workers=Config.IMAGE_WORKERS, thread_name_prefix="image-worker"
+            )
+            _workers_pid = os.getpid()
+            _pending.clear()
+    return _workers
+
+
+# ---------------- TEMPLATE HELPERS ----------------
+def upload_url(kind, filename, width=None, fmt="jpg"):
+    """URL of ``filename``'s variant closest to ``width`` (original if none)."""
+    if width and filename and kind in VARIANT_WIDTHS:
+        fitting = [w for w in VARIANT_WIDTHS[kind] if w >= width]
+        best = min(fitting) if fitting else max(VARIANT_WIDTHS[kind])
+        name = variant_name(filename, best, fmt)
+        if os.path.exists(os.path.join(UPLOAD_ROOT, kind, name)):
+            return url_for("static", filename=f"uploads/{kind}/{name}")
+    return url_for("static", filename=f"uploads/{kind}/{filename}")
+
+
+def mark_immutable(response):
+    if request.endpoint == "static" and HASHED_NAME.match(
+        os.path.basename(request.path)
+    ):
+        response.cache_control.immutable = True
+    return response
+
+
+# ---------------- CLI ----------------
+@click.command("images-render")
+def images_render_command():
+    """Render missing variants for every stored upload (incl. pre-hash names)."""
+    count = 0
+    for kind in VARIANT_WIDTHS:
+        for filename in sorted(os.listdir(upload_dir(kind))):
+            if VARIANT_NAME.search(filename) or filename.endswith(".tmp"):
+                continue
+            render_variants(kind, filename)
+            count += 1
+    click.echo(f"Rendered variants for {count} uploads.")
+
+
+def init_app(app):
+    app.jinja_env.globals["upload_url"] = upload_url
+    app.after_request(mark_immutable)
+    app.cli.add_command(images_render_command)
+
+    # Content-hashed uploads never change under the same name
+    default_max_age = app.get_send_file_max_age
+
+    def get_send_file_max_age(filename):
+        if filename and HASHED_NAME.match(os.path.basename(filename)):
+            return Config.IMAGE_CACHE_MAX_AGE
+        return default_max_age(filename)
+
+    app.get_send_file_max_age = get_send_file_max_age
@@ -0,0 +1,77 @@
+# ---------------- ORDER STOCK MOVEMENTS ----------------
+# Every order's stock change is written to inventory_ledger together with
+# the menus UPDATE. The ledger key (order_id, menu_id) means a second
+# attempt for the same order (confirm, then complete) changes nothing.
+
+# Rows are locked in id order so concurrent orders cannot deadlock
+ORDER_STOCK_SQL = """
+    WITH wanted AS (
+        SELECT menu_id, qty
+        FROM order_items
+        WHERE order_id = %(order_id)s::int
+    ),
+    locked AS (
+        SELECT m.id, m.available_quantity
+        FROM menus m
+        JOIN wanted w ON w.menu_id = m.id
+        ORDER BY m.id
+        FOR UPDATE OF m
+    ),
+    recorded AS (
+        INSERT INTO inventory_ledger (order_id, menu_id, quantity, reason)
+        SELECT %(order_id)s::int, w.menu_id, -w.qty, %(reason)s::varchar
+        FROM wanted w
+        JOIN locked l ON l.id = w.menu_id
+        WHERE NOT %(strict)s::boolean OR l.available_quantity >= w.qty
+        ON CONFLICT (order_id, menu_id) DO NOTHING
+        RETURNING menu_id, -quantity AS qty
+    ),
+    updated AS (
+        UPDATE menus m
+        SET available_quantity = GREATEST(m.available_quantity - r.qty, 0)
+        FROM recorded r
+        WHERE m.id = r.menu_id
+        RETURNING m.id
+    ),
+    already AS (
+        SELECT COUNT(*) AS n
+        FROM inventory_ledger
+        WHERE order_id = %(order_id)s::int
+    )
+    SELECT
+        (SELECT COUNT(*) FROM updated) AS applied,
+        (SELECT n FROM already) AS previously_applied,
+        (SELECT COUNT(*) FROM locked) AS found,
+        (SELECT COUNT(*) FROM wanted) AS wanted
+    """
+
+
+def order_stock_params(order_id, reason, strict=True):
+    """Return the ORDER_STOCK_SQL parameters for the lines of ``order_id``."""
+    return {
+        "order_id": order_id,
+        "reason": reason,
+        "strict": strict,
+    }
+
+
+def check_order_stock(result, params):
+    # Nothing new recorded and nothing recorded before: a line was missing
+    # or short on stock.
+    if params["strict"] and result["previously_applied"] == 0:
+        if result["found"] != result["wanted"]:
+            raise Exception("Item no longer on the menu")
+        if result["applied"] != result["wanted"]:
+            raise Exception("Item unavailable")
+    return result["applied"]
+
+
+def apply_order_stock(cur, order_id, reason, strict=True):
+    """Decrement stock for the order's lines once per order, in one statement.
+
+    With ``strict`` a shortfall raises (and the caller rolls back);
+    otherwise stock is clamped at zero.
+    """
+    params = order_stock_params(order_id, reason, strict)
+    cur.execute(ORDER_STOCK_SQL, params)
+    return check_order_stock(cur.fetchone(), params)
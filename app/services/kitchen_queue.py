@@ -0,0 +1,213 @@
+import bisect
+import os
+import threading
+import time
+
+from config import Config
+from app.models.db import get_db_connection
+from app.services.order_feed import (
+    KITCHEN_ORDER_SELECT,
+    REMOVAL_EVENTS,
+    fetch_kitchen_order,
+    format_kitchen_order,
+    get_order_feed,
+)
+
+# ---------------- KITCHEN PRIORITY QUEUE ----------------
+# Active orders per hotel kept sorted by (order["priority"], id) (see
+# order_feed.kitchen_priority). The queue is loaded from the database once
+# per hotel and process, then updated from LISTEN/NOTIFY order events, so
+# hotel.orders reads an already-ordered list instead of sorting per request.
+
+
+class KitchenQueue:
+    def __init__(self, orders=()):
+        self._keys = []  # sorted (priority, order_id)
+        self._entries = {}  # order_id -> (key, order)
+        self._snapshot = None
+        self.loaded_at = time.monotonic()
+        for order in orders:
+            self.upsert(order)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert(self, order):
+        self._discard(order["id"])
+        key = (order["priority"], order["id"])
+        self._entries[order["id"]] = (key, order)
+        bisect.insort(self._keys, key)
+        self._snapshot = None
+
+    def remove(self, order_id):
+        if self._discard(order_id):
+            self._snapshot = None
+
+    def _discard(self, order_id):
+        old = self._entries.pop(order_id, None)
+        if old is None:
+            return False
+        del self._keys[bisect.bisect_left(self._keys, old[0])]
+        return True
+
+    def top(self, n):
+        return [self._entries[key[1]][1] for key in self._keys[:n]]
+
+    def ordered(self):
+        # Rebuilt only after the queue changed; reads in between are free
+        if self._snapshot is None:
+            self._snapshot = self.top(len(self._keys))
+        return self._snapshot
+
+
+class KitchenQueues:
+    """Per-process registry of hotel queues, fed by the order feed."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._queues = {}  # hotel_id -> KitchenQueue
+        self._loading = {}  # hotel_id -> (done Event, events seen meanwhile)
+        self._resyncs = 0
+        self._lock = threading.Lock()
+
+    def _load(self, hotel_id):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                KITCHEN_ORDER_SELECT
+                + " WHERE o.hotel_id = %s"
+                + " AND o.order_status NOT IN ('completed', 'cancelled')",
+                (hotel_id,),
+            )
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+        return KitchenQueue(format_kitchen_order(row) for row in rows)
+
+    def ordered(self, hotel_id):
+        kitchen = self._queue(hotel_id)
+        with self._lock:
+            return kitchen.ordered()
+
+    def _queue(self, hotel_id):
+        # Reloaded after ttl as a backstop for missed events (e.g. a
+        # premium flag changed on an open order). One thread loads per
+        # hotel; the others keep reading the stale queue, or wait if there
+        # is none yet.
+        with self._lock:
+            kitchen = self._queues.get(hotel_id)
+            if kitchen is not None and time.monotonic() - kitchen.loaded_at < self.ttl:
+                return kitchen
+
+            loading = self._loading.get(hotel_id)
+            if loading is None:
+                loading = self._loading[hotel_id] = (threading.Event(), [])
+                resyncs = self._resyncs
+            elif kitchen is not None:
+                return kitchen
+            else:
+                resyncs = None
+
+        if resyncs is None:
+            loading[0].wait()
+            kitchen = self._queues.get(hotel_id)
+            # None if the loader failed: retry (and raise) in this request
+            return kitchen if kitchen is not None else self._queue(hotel_id)
+
+        kitchen = None
+        try:
+            kitchen = self._load(hotel_id)
+        finally:
+            # Events that raced the query are replayed (upserts and
+            # removals are idempotent) before the queue becomes visible
+            with self._lock:
+                del self._loading[hotel_id]
+                if kitchen is not None:
+                    for event, order in loading[1]:
+                        self._apply(kitchen, event, order)
+                    if self._resyncs != resyncs:
+                        # The feed dropped mid-load; serve it once, reload next
+                        kitchen.loaded_at -= self.ttl
+                    self._queues[hotel_id] = kitchen
+                loading[0].set()
+        return kitchen
+
+    def _apply(self, kitchen, event, order):
+        # A late or locally applied event may carry an order that has since
+        # finished; its row status is what counts
+        if (
+            event["event"] in REMOVAL_EVENTS
+            or order is None
+            or order["order_status"] in REMOVAL_EVENTS
+        ):
+            kitchen.remove(event["order_id"])
+        else:
+            kitchen.upsert(order)
+
+    # Order feed listener interface
+    def tracks(self, hotel_id):
+        return hotel_id in self._queues or hotel_id in self._loading
+
+    def on_event(self, event, order):
+        with self._lock:
+            loading = self._loading.get(event["hotel_id"])
+            if loading is not None:
+                loading[1].append((event, order))
+            kitchen = self._queues.get(event["hotel_id"])
+            if kitchen is not None:
+                self._apply(kitchen, event, order)
+
+    def on_resync(self):
+        # Events were missed while the feed was down; reload lazily
+        with self._lock:
+            self._queues.clear()
+            self._resyncs += 1
+
+
+_queues = None
+_queues_pid = None
+_queues_lock = threading.Lock()
+
+
+def get_kitchen_queues():
+    global _queues, _queues_pid
+
+    with _queues_lock:
+        if _queues is None or _queues_pid != os.getpid():
+            _queues = KitchenQueues(Config.KITCHEN_QUEUE_TTL)
+            _queues_pid = os.getpid()
+            get_order_feed().add_listener(_queues)
+    return _queues
+
+
+def kitchen_orders(hotel_id, phone=None, limit=None):
+    """Active orders for ``hotel_id`` in kitchen priority order."""
+    orders = get_kitchen_queues().ordered(hotel_id)
+    if phone:
+        orders = [o for o in orders if phone in (o["phone"] or "")]
+    return orders[:limit] if limit else orders
+
+
+def apply_local_event(event, order_id, hotel_id):
+    """Apply an order change this process just committed.
+
+    The NOTIFY for it reaches the queue asynchronously; applying it here
+    too means the request that made the change reads it back at once.
+    Replaying the same event later is harmless.
+    """
+    # Processes that never served this hotel's kitchen have nothing to update
+    queues = _queues if _queues_pid == os.getpid() else None
+    if queues is None or not queues.tracks(hotel_id):
+        return
+
+    order = None
+    if event not in REMOVAL_EVENTS:
+        try:
+            order = fetch_kitchen_order(order_id)
+        except Exception as e:
+            # The change is committed; the NOTIFY still brings it in
+            print("KITCHEN QUEUE ERROR:", e)
+            return
+    queues.on_event({"event": event, "order_id": order_id, "hotel_id": hotel_id}, order)
@@ -0,0 +1,98 @@
+from config import Config
+from app.services.cache import make_cache
+
+# Hotel header + menu items change rarely and are invalidated on write.
+# available_quantity moves with every order, so it is cached separately
+# with a short TTL and merged in on read. Invalidation reaches every
+# worker only through a shared (Redis) backend; per-process caches use
+# the short MENU_CACHE_LOCAL_TTL so other workers catch up quickly.
+_menu_ttl = (
+    Config.MENU_CACHE_TTL if Config.CACHE_REDIS_URL else Config.MENU_CACHE_LOCAL_TTL
+)
+_menu_cache = make_cache("menu", Config.MENU_CACHE_SIZE, ttl=_menu_ttl)
+_stock_cache = make_cache(
+    "menu_stock", Config.MENU_CACHE_SIZE, ttl=Config.MENU_STOCK_TTL
+)
+
+
+def get_hotel_menu(cur, hotel_id):
+    """Return ``(hotel, menus)`` for the customer menu page.
+
+    ``hotel`` is None when the hotel is not currently bookable.
+    """
+    entry = _menu_cache.get(hotel_id)
+    if entry is None:
+        entry = _load_menu(cur, hotel_id)
+        _menu_cache.set(hotel_id, entry)
+
+    if entry["hotel"] is None:
+        return None, []
+
+    stock = _stock_cache.get(hotel_id)
+    if stock is None:
+        stock = _load_stock(cur, hotel_id)
+        _stock_cache.set(hotel_id, stock)
+
+    menus = [
+        dict(item, available_quantity=stock[item["id"]])
+        for item in entry["menus"]
+        if item["id"] in stock
+    ]
+    return entry["hotel"], menus
+
+
+def _load_menu(cur, hotel_id):
+    cur.execute(
+        """
+        SELECT id, hotel_name, location, slot_minutes
+        FROM hotels
+        WHERE id=%s
+          AND status='approved'
+          AND is_active=TRUE
+          AND is_open=TRUE
+    """,
+        (hotel_id,),
+    )
+    hotel = cur.fetchone()
+
+    if not hotel:
+        return {"hotel": None, "menus": []}
+
+    cur.execute(
+        """
+        SELECT id, item_name, category, price, image
+        FROM menus
+        WHERE hotel_id=%s
+          AND is_available=TRUE
+        ORDER BY category, item_name
+    """,
+        (hotel_id,),
+    )
+    return {"hotel": dict(hotel), "menus": [dict(row) for row in cur.fetchall()]}
+
+
+def _load_stock(cur, hotel_id):
+    cur.execute(
+        """
+        SELECT id, available_quantity
+        FROM menus
+        WHERE hotel_id=%s
+          AND is_available=TRUE
+    """,
+        (hotel_id,),
+    )
+    return {row["id"]: row["available_quantity"] for row in cur.fetchall()}
+
+
+# ---------------- INVALIDATION ----------------
+def invalidate_menu(hotel_id):
+    if hotel_id is None:
+        return
+    _menu_cache.delete(int(hotel_id))
+    _stock_cache.delete(int(hotel_id))
+
+
+def invalidate_stock(hotel_id):
+    if hotel_id is None:
+        return
+    _stock_cache.delete(int(hotel_id))
@@ -0,0 +1,142 @@
+import hmac
+import os
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from config import Config
+from app.models import instrumentation
+from app.models.db import pool_stats
+
+# Process-local metrics in prometheus_client's format. Under gunicorn set
+# PROMETHEUS_MULTIPROC_DIR (an empty directory) so /metrics aggregates
+# every worker instead of whichever one answered the scrape.
+
+# ---------------- HTTP ----------------
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by endpoint",
+    ["endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by endpoint and status",
+    ["endpoint", "method", "status"],
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being handled",
+    multiprocess_mode="livesum",
+)
+
+# ---------------- DATABASE ----------------
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "SQL statements that raised")
+DB_POOL = Gauge(
+    "db_pool_connections",
+    "Pooled connections by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITS = Gauge(
+    "db_pool_waits",
+    "Checkouts that had to wait for a free connection",
+    multiprocess_mode="livesum",
+)
+DB_POOL_TIMEOUTS = Gauge(
+    "db_pool_timeouts",
+    "Checkouts that gave up waiting",
+    multiprocess_mode="livesum",
+)
+
+# ---------------- ORDER PIPELINE ----------------
+ORDERS_PLACED = Counter("orders_placed_total", "Orders placed", ["payment_mode"])
+ORDERS_CONFIRMED = Counter("orders_confirmed_total", "Orders confirmed")
+ORDERS_COMPLETED = Counter("orders_completed_total", "Orders completed", ["late"])
+QR_RENDER_SECONDS = Histogram(
+    "qr_render_duration_seconds",
+    "QR PNG render time",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+
+def observe_query(seconds, failed=False):
+    DB_QUERY_SECONDS.observe(seconds)
+    if failed:
+        DB_QUERY_ERRORS.inc()
+
+
+def update_pool_gauges():
+    stats = pool_stats()
+    if not stats:
+        return
+    DB_POOL.labels("in_use").set(stats["in_use"])
+    DB_POOL.labels("idle").set(stats["idle"])
+    DB_POOL.labels("max").set(stats["max_size"])
+    DB_POOL_WAITS.set(stats["waits"])
+    DB_POOL_TIMEOUTS.set(stats["timeouts"])
+
+
+# ---------------- REQUEST HOOKS ----------------
+def start_request():
+    g._metrics_started = time.perf_counter()
+    g._metrics_in_flight = True
+    IN_FLIGHT.inc()
+
+
+def finish_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is not None:
+        # Unmatched URLs share one label so 404 scans can't explode series
+        endpoint = request.endpoint or "unmatched"
+        REQUEST_SECONDS.labels(endpoint, request.method).observe(
+            time.perf_counter() - started
+        )
+        REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+        update_pool_gauges()
+    return response
+
+
+def end_request(exc=None):
+    if g.pop("_metrics_in_flight", False):
+        IN_FLIGHT.dec()
+
+
+def scrape_allowed():
+    """A scrape comes from an allowed address or carries the bearer token."""
+    if request.remote_addr in Config.METRICS_ALLOWED_IPS:
+        return True
+    token = Config.METRICS_TOKEN
+    auth = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(auth, f"Bearer {token}")
+
+
+def render_metrics():
+    update_pool_gauges()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    if observe_query not in instrumentation.query_observers:
+        instrumentation.query_observers.append(observe_query)
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(end_request)
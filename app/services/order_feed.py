@@ -0,0 +1,237 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+from config import Config
+from app.models.db import get_db_connection, get_direct_connection
+
+ORDER_EVENTS_CHANNEL = "order_events"
+
+# Events that take an order off the kitchen screen (nothing to fetch)
+REMOVAL_EVENTS = ("completed", "cancelled")
+
+# Columns the kitchen view (full page and live rows) renders
+KITCHEN_ORDER_SELECT = """
+    SELECT
+        o.id,
+        o.total_people,
+        o.total_amount,
+        o.order_status,
+        o.order_time,
+        o.scheduled_time,
+        o.qr_code,
+        COALESCE(
+            (
+                SELECT json_agg(
+                    json_build_object(
+                        'menu_id', oi.menu_id, 'name', oi.item_name,
+                        'qty', oi.qty, 'price', oi.unit_price
+                    )
+                    ORDER BY oi.item_name
+                )
+                FROM order_items oi
+                WHERE oi.order_id = o.id
+            ),
+            '[]'
+        ) AS items,
+        o.payment_mode,
+
+        u.id AS user_id,
+        u.user_full_name,
+        u.user_phone,
+        u.is_premium
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+"""
+
+
+# ---------------- KITCHEN ORDER ROWS ----------------
+def kitchen_priority(row):
+    """Sort key for the kitchen queue (smaller = cook first).
+
+    Orders are due at their scheduled time (or when placed, if none);
+    premium orders count as due KITCHEN_PREMIUM_BOOST_MINUTES earlier, and
+    among equally due orders the one waiting longest goes first. Encoded
+    as a fixed-width string so the page script can compare it too.
+    """
+    placed = int(row["order_time"].timestamp()) if row["order_time"] else 0
+    due = int(row["scheduled_time"].timestamp()) if row["scheduled_time"] else placed
+    if row["is_premium"]:
+        due -= Config.KITCHEN_PREMIUM_BOOST_MINUTES * 60
+    return f"{max(due, 0):011d}-{placed:011d}-{row['id']:010d}"
+
+
+def format_kitchen_order(row):
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "full_name": row["user_full_name"],
+        "phone": row["user_phone"],
+        "is_premium": row["is_premium"],
+        "payment_mode": row["payment_mode"],
+        "total_people": row["total_people"],
+        "total_amount": row["total_amount"],
+        "order_status": row["order_status"],
+        "order_time": (
+            row["order_time"].strftime("%d %b %Y %I:%M %p")
+            if row["order_time"]
+            else "N/A"
+        ),
+        "scheduled_time": (
+            row["scheduled_time"].strftime("%d %b %Y %I:%M %p")
+            if row["scheduled_time"]
+            else "N/A"
+        ),
+        "priority": kitchen_priority(row),
+        "qr_code": row["qr_code"],
+        "order_items": row["items"],
+    }
+
+
+def fetch_kitchen_order(order_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(KITCHEN_ORDER_SELECT + " WHERE o.id = %s", (order_id,))
+        row = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    return format_kitchen_order(row) if row else None
+
+
+# ---------------- LISTEN / NOTIFY FAN-OUT ----------------
+class OrderFeed:
+    """One LISTEN connection per process, fanned out to SSE subscribers.
+
+    Each event's order row is fetched once, and only when some kitchen
+    screen for that hotel is connected.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # hotel_id -> set of queues
+        self._listeners = []  # in-process caches, e.g. kitchen_queue
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="order-feed", daemon=True
+            )
+            self._thread.start()
+
+    def subscribe(self, hotel_id):
+        q = queue.Queue(maxsize=Config.ORDER_FEED_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(hotel_id, set()).add(q)
+            self._start()
+        return q
+
+    def add_listener(self, listener):
+        """Register an object with tracks(hotel_id), on_event(event, order)
+        and on_resync(); it sees every event for the hotels it tracks."""
+        with self._lock:
+            self._listeners.append(listener)
+            self._start()
+
+    def unsubscribe(self, hotel_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(hotel_id)
+            if subscribers:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[hotel_id]
+
+    def _run(self):
+        reconnecting = False
+        while True:
+            conn = None
+            try:
+                conn = get_direct_connection(autocommit=True)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {ORDER_EVENTS_CHANNEL}")
+
+                # Anything missed while disconnected needs a full reload
+                if reconnecting:
+                    self._broadcast({"event": "resync"})
+                reconnecting = True
+
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(json.loads(notify.payload))
+
+            except Exception as e:
+                print("ORDER FEED ERROR:", e)
+                time.sleep(Config.ORDER_FEED_RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["hotel_id"], ()))
+            listeners = [l for l in self._listeners if l.tracks(event["hotel_id"])]
+        if not subscribers and not listeners:
+            return
+
+        # Fetched once for every screen and cache interested in the hotel
+        order = None
+        if event["event"] not in REMOVAL_EVENTS:
+            order = fetch_kitchen_order(event["order_id"])
+
+        for listener in listeners:
+            listener.on_event(event, order)
+
+        if order is None and event["event"] not in REMOVAL_EVENTS:
+            return
+
+        message = {"event": event["event"], "order_id": event["order_id"]}
+        if order is not None:
+            message["order"] = order
+        for q in subscribers:
+            self._offer(q, message)
+
+    def _broadcast(self, message):
+        with self._lock:
+            subscribers = [q for qs in self._subscribers.values() for q in qs]
+            listeners = list(self._listeners)
+        if message["event"] == "resync":
+            for listener in listeners:
+                listener.on_resync()
+        for q in subscribers:
+            self._offer(q, message)
+
+    def _offer(self, q, message):
+        try:
+            q.put_nowait(message)
+        except queue.Full:
+            # A stalled screen falls back to reloading the page
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            q.put_nowait({"event": "resync"})
+
+
+_feed = None
+_feed_pid = None
+_feed_lock = threading.Lock()
+
+
+def get_order_feed():
+    global _feed, _feed_pid
+
+    with _feed_lock:
+        if _feed is None or _feed_pid != os.getpid():
+            _feed = OrderFeed()
+            _feed_pid = os.getpid()
+    return _feed
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import os
+import queue
+import threading
+
+import qrcode
+from config import Config
+from app.models.db import get_db_connection
+from app.services.cache import LRUCache
+from app.services.metrics import QR_RENDER_SECONDS
+
+
+def qr_value(order_id):
+    return f"ORDER_ID:{order_id}"
+
+
+def qr_url(order_id):
+    return f"/user/qr/{order_id}.png"
+
+
+def qr_etag(order_id):
+    # The image is a pure function of the payload, so no render is needed
+    return hashlib.sha1(qr_value(order_id).encode()).hexdigest()
+
+
+# ---------------- RENDER CACHE ----------------
+_png_cache = LRUCache(Config.QR_CACHE_SIZE)
+
+
+def render_qr_png(order_id):
+    png = _png_cache.get(order_id)
+    if png is None:
+        with QR_RENDER_SECONDS.time():
+            buf = io.BytesIO()
+            qrcode.make(qr_value(order_id)).save(buf)
+            png = buf.getvalue()
+        _png_cache.set(order_id, png)
+    return png
+
+
+def render_qr(order_id):
+    # Warm the cache. Confirmation already stores the URL; orders confirmed
+    # before it did get it here
+    render_qr_png(order_id)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            "UPDATE orders SET qr_image_url=%s WHERE id=%s AND qr_image_url IS NULL",
+            (qr_url(order_id), order_id),
+        )
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+    return qr_url(order_id)
+
+
+# ---------------- BACKGROUND WORKERS ----------------
+class QRWorkerPool:
+    def __init__(self, workers, queue_size):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = set()  # order ids queued or being rendered
+        self._lock = threading.Lock()
+
+        for i in range(workers):
+            threading.Thread(
+                target=self._run, name=f"qr-worker-{i}", daemon=True
+            ).start()
+
+    def submit(self, order_id):
+        with self._lock:
+            if order_id in self._pending:
+                return True
+            self._pending.add(order_id)
+
+        try:
+            self._queue.put_nowait((order_id, 0))
+        except queue.Full:
+            self._finish(order_id)
+            return False
+        return True
+
+    def pending(self, order_id):
+        with self._lock:
+            return order_id in self._pending
+
+    def _finish(self, order_id):
+        with self._lock:
+            self._pending.discard(order_id)
+
+    def _retry(self, order_id, attempt):
+        try:
+            self._queue.put_nowait((order_id, attempt))
+        except queue.Full:
+            # Left to ensure_qr() on the next status poll
+            self._finish(order_id)
+
+    def _run(self):
+        while True:
+            order_id, attempt = self._queue.get()
+            try:
+                render_qr(order_id)
+                self._finish(order_id)
+            except Exception as e:
+                print("QR RENDER ERROR:", order_id, e)
+                if attempt < Config.QR_RENDER_RETRIES:
+                    # Back off without holding a worker thread
+                    delay = Config.QR_RETRY_BACKOFF * 2**attempt
+                    threading.Timer(delay, self._retry, (order_id, attempt + 1)).start()
+                else:
+                    self._finish(order_id)
+            finally:
+                self._queue.task_done()
+
+
+_workers = None
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+def get_qr_workers():
+    global _workers, _workers_pid
+
+    # Threads do not survive fork, so each worker process starts its own
+    with _workers_lock:
+        if _workers is None or _workers_pid != os.getpid():
+            _workers = QRWorkerPool(Config.QR_WORKERS, Config.QR_QUEUE_SIZE)
+            _workers_pid = os.getpid()
+    return _workers
+
+
+def enqueue_qr(order_id):
+    # Render inline when the queue is saturated rather than dropping the job
+    if not get_qr_workers().submit(order_id):
+        render_qr(order_id)
+
+
+def ensure_qr(order_id):
+    """Render inline unless a worker of this process still has the order.
+
+    Covers renders that ran out of retries and jobs queued in another
+    worker process (pending state is per process). The image is a pure
+    function of the order id, so rendering it twice is harmless.
+    """
+    if get_qr_workers().pending(order_id):
+        return None
+    try:
+        return render_qr(order_id)
+    except Exception as e:
+        print("QR RENDER ERROR:", order_id, e)
+        return None
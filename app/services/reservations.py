@@ -0,0 +1,387 @@
+import math
+import os
+
+import click
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from config import Config
+from app.models.db import get_db_connection
+
+# ---------------- RESERVATION SLOTS ----------------
+# Each hotel's day is split into slot_minutes slots; a booking for N people
+# takes N seats in every slot its dining_minutes overlap. slot_bookings in
+# the database is the source of truth (raised only by the conditional
+# upsert in book_slot, lowered by release_slots when an order is
+# cancelled); SlotIndex mirrors it in memory per process so availability
+# lookups do not touch the database.
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+BOOK_SLOT_SQL = """
+    WITH booked AS (
+        INSERT INTO slot_bookings (hotel_id, slot_start, seats_booked)
+        SELECT %(hotel_id)s, slot_start, %(people)s
+        FROM unnest(%(slots)s::timestamp[]) AS slot_start
+        WHERE %(people)s <= %(capacity)s
+        ORDER BY slot_start
+        ON CONFLICT (hotel_id, slot_start) DO UPDATE
+            SET seats_booked = slot_bookings.seats_booked + EXCLUDED.seats_booked
+            WHERE slot_bookings.seats_booked + EXCLUDED.seats_booked <= %(capacity)s
+        RETURNING slot_start
+    )
+    INSERT INTO reservations (order_id, hotel_id, slot_start, slot_count, people)
+    SELECT %(order_id)s, %(hotel_id)s, %(slot_start)s, %(slot_count)s, %(people)s
+    WHERE (SELECT count(*) FROM booked) = %(slot_count)s
+    RETURNING order_id
+"""
+
+RELEASE_SLOTS_SQL = """
+    WITH released AS (
+        DELETE FROM reservations
+        WHERE order_id = ANY(%(order_ids)s)
+        RETURNING hotel_id, slot_start, slot_count, people
+    ),
+    freed AS (
+        SELECT
+            r.hotel_id,
+            r.slot_start + s.i * make_interval(mins => h.slot_minutes) AS slot_start,
+            SUM(r.people) AS people
+        FROM released r
+        JOIN hotels h ON h.id = r.hotel_id
+        CROSS JOIN LATERAL generate_series(0, r.slot_count - 1) AS s(i)
+        GROUP BY 1, 2
+    )
+    UPDATE slot_bookings b
+    SET seats_booked = GREATEST(b.seats_booked - f.people, 0)
+    FROM freed f
+    WHERE b.hotel_id = f.hotel_id AND b.slot_start = f.slot_start
+    RETURNING f.hotel_id, f.slot_start, f.people
+"""
+
+
+class HotelSlots:
+    def __init__(self, capacity, slot_minutes, dining_minutes):
+        self.capacity = capacity
+        self.slot_minutes = slot_minutes
+        self.dining_slots = max(1, math.ceil(dining_minutes / slot_minutes))
+        self.per_day = 1440 // slot_minutes
+        self.days = {}  # date -> [seats booked per slot]
+        self.loaded_at = time.monotonic()
+
+    def slot_of(self, when):
+        minute = when.hour * 60 + when.minute
+        return when.date(), minute // self.slot_minutes
+
+    def slot_starts(self, when):
+        day, index = self.slot_of(when)
+        start = datetime.combine(day, datetime.min.time()) + timedelta(
+            minutes=index * self.slot_minutes
+        )
+        step = timedelta(minutes=self.slot_minutes)
+        return [start + i * step for i in range(self.dining_slots)]
+
+    def add(self, slot_start, seats):
+        day, index = self.slot_of(slot_start)
+        booked = self.days.setdefault(day, [0] * self.per_day)
+        booked[index] += seats
+
+    def available(self, day, people, not_before=None):
+        if people > self.capacity:
+            return []
+
+        # A late booking runs into the next day's first slots
+        booked = self.days.get(day, [0] * self.per_day)
+        booked = booked + self.days.get(day + timedelta(days=1), [0] * self.per_day)
+        limit = self.capacity - people
+
+        first = 0
+        if not_before is not None and not_before.date() == day:
+            first = self.slot_of(not_before)[1] + 1
+        elif not_before is not None and not_before.date() > day:
+            return []
+
+        midnight = datetime.combine(day, datetime.min.time())
+        return [
+            midnight + timedelta(minutes=i * self.slot_minutes)
+            for i in range(first, self.per_day)
+            if max(booked[i : i + self.dining_slots]) <= limit
+        ]
+
+
+class SlotIndex:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._hotels = {}  # hotel_id -> HotelSlots
+        self._lock = threading.Lock()
+
+    def _load(self, hotel_id=None):
+        # Capacity plus upcoming bookings, for one hotel or all of them
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        try:
+            cur.execute(
+                """
+                SELECT
+                    h.id, h.seating_capacity, h.slot_minutes, h.dining_minutes,
+                    b.slot_start, b.seats_booked
+                FROM hotels h
+                LEFT JOIN slot_bookings b
+                  ON b.hotel_id = h.id AND b.slot_start >= CURRENT_DATE
+                WHERE h.status = 'approved'
+                  AND (%(hotel_id)s::int IS NULL OR h.id = %(hotel_id)s)
+                """,
+                {"hotel_id": hotel_id},
+            )
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+
+        hotels = {}
+        for row in rows:
+            slots = hotels.get(row["id"])
+            if slots is None:
+                slots = hotels[row["id"]] = HotelSlots(
+                    row["seating_capacity"], row["slot_minutes"], row["dining_minutes"]
+                )
+            if row["slot_start"] is not None:
+                slots.add(row["slot_start"], row["seats_booked"])
+        return hotels
+
+    def rebuild(self):
+        hotels = self._load()
+        with self._lock:
+            self._hotels = hotels
+
+    def _hotel(self, hotel_id):
+        # Other workers book too, so entries are refreshed after ttl
+        slots = self._hotels.get(hotel_id)
+        if slots is None or time.monotonic() - slots.loaded_at > self.ttl:
+            slots = self._load(hotel_id).get(hotel_id)
+            with self._lock:
+                if slots is None:
+                    self._hotels.pop(hotel_id, None)
+                else:
+                    self._hotels[hotel_id] = slots
+        return slots
+
+    def available(self, hotel_id, day, people, not_before=None):
+        slots = self._hotel(hotel_id)
+        if slots is None:
+            return None
+        with self._lock:
+            return slots.available(day, people, not_before)
+
+    def record(self, hotel_id, slot_starts, people):
+        with self._lock:
+            slots = self._hotels.get(hotel_id)
+            if slots is not None:
+                for slot_start in slot_starts:
+                    slots.add(slot_start, people)
+
+    def invalidate(self, hotel_id):
+        with self._lock:
+            self._hotels.pop(hotel_id, None)
+
+
+_index = None
+_index_pid = None
+_index_lock = threading.Lock()
+
+
+def get_slot_index():
+    global _index, _index_pid
+
+    # Built from the database once per worker process, then kept current
+    # by index_booking() and the per-hotel ttl refresh
+    with _index_lock:
+        if _index is None or _index_pid != os.getpid():
+            index = SlotIndex(Config.SLOT_INDEX_TTL)
+            index.rebuild()
+            _index, _index_pid = index, os.getpid()
+    return _index
+
+
+# ---------------- PUBLIC API ----------------
+def available_slots(hotel_id, day, people):
+    """Slot start times on ``day`` with room for ``people`` (None = no hotel)."""
+    return get_slot_index().available(hotel_id, day, people, not_before=datetime.now())
+
+
+def book_slot(cur, order_id, hotel_id, scheduled_time, people):
+    """Reserve seats for an order inside the caller's transaction.
+
+    Raises SlotUnavailable when any overlapped slot would exceed the
+    hotel's capacity; the caller must roll back. Returns the booked slot
+    starts for index_booking() once the transaction has committed.
+    """
+    if isinstance(scheduled_time, str):
+        scheduled_time = datetime.fromisoformat(scheduled_time)
+
+    cur.execute(
+        """
+        SELECT seating_capacity, slot_minutes, dining_minutes
+        FROM hotels
+        WHERE id = %s
+        """,
+        (hotel_id,),
+    )
+    hotel = cur.fetchone()
+    slots = HotelSlots(
+        hotel["seating_capacity"], hotel["slot_minutes"], hotel["dining_minutes"]
+    ).slot_starts(scheduled_time)
+
+    cur.execute(
+        BOOK_SLOT_SQL,
+        {
+            "order_id": order_id,
+            "hotel_id": hotel_id,
+            "people": people,
+            "capacity": hotel["seating_capacity"],
+            "slots": slots,
+            "slot_start": slots[0],
+            "slot_count": len(slots),
+        },
+    )
+    if cur.fetchone() is None:
+        # The index was behind the database; reload it on the next lookup
+        get_slot_index().invalidate(hotel_id)
+        raise SlotUnavailable(f"No table for {people} at {slots[0]:%d %b %H:%M}")
+
+    return slots
+
+
+def index_booking(hotel_id, slot_starts, people):
+    get_slot_index().record(hotel_id, slot_starts, people)
+
+
+def release_slots(cur, order_ids):
+    """Give back the seats held by ``order_ids`` inside the caller's
+    transaction. Returns the freed rows for unindex_slots() once the
+    transaction has committed.
+    """
+    if not order_ids:
+        return []
+    cur.execute(RELEASE_SLOTS_SQL, {"order_ids": list(order_ids)})
+    return cur.fetchall()
+
+
+def unindex_slots(freed):
+    # Only an index already built in this process needs the update (the
+    # CLI has none; other workers catch up through the ttl refresh)
+    index = _index if _index_pid == os.getpid() else None
+    if index is not None:
+        for row in freed:
+            index.record(row["hotel_id"], [row["slot_start"]], -row["people"])
+
+
+def cancel_order(order_id):
+    """Cancel an order that was never confirmed and release its table.
+
+    Returns the order's hotel id, or None when there was nothing to cancel
+    (already confirmed or cancelled).
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            """
+            UPDATE orders
+            SET order_status = 'cancelled'
+            WHERE id = %s
+              AND qr_code IS NULL
+              AND order_status NOT IN ('completed', 'cancelled')
+            RETURNING hotel_id
+            """,
+            (order_id,),
+        )
+        row = cur.fetchone()
+        freed = release_slots(cur, [order_id]) if row else []
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print("ORDER CANCEL ERROR:", e)
+        return None
+    finally:
+        cur.close()
+        conn.close()
+
+    unindex_slots(freed)
+    return row["hotel_id"] if row else None
+
+
+def expire_unpaid_orders(minutes=None):
+    """Cancel online orders still unpaid after ``minutes`` and release
+    their tables. Returns the cancelled order ids.
+    """
+    if minutes is None:
+        minutes = Config.UNPAID_ORDER_TTL_MINUTES
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        # Rows locked by a payment being confirmed are re-checked after it
+        # commits (qr_code is then set); a later payment finds the order
+        # cancelled
+        cur.execute(
+            """
+            UPDATE orders
+            SET order_status = 'cancelled'
+            WHERE payment_mode = 'online'
+              AND qr_code IS NULL
+              AND order_status = 'paid'
+              AND created_at < NOW() - make_interval(mins => %s)
+            RETURNING id
+            """,
+            (minutes,),
+        )
+        order_ids = [row["id"] for row in cur.fetchall()]
+        freed = release_slots(cur, order_ids)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print("ORDER EXPIRY ERROR:", e)
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    unindex_slots(freed)
+    return order_ids
+
+
+def invalidate_hotel_slots(hotel_id):
+    get_slot_index().invalidate(hotel_id)
+
+
+def parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------- CLI ----------------
+@click.command("orders-expire")
+@click.option(
+    "--minutes",
+    type=int,
+    default=None,
+    help="Payment window (default: UNPAID_ORDER_TTL_MINUTES).",
+)
+def orders_expire_command(minutes):
+    """Cancel unpaid online orders and release their tables (run from cron)."""
+    order_ids = expire_unpaid_orders(minutes)
+    click.echo(f"Cancelled {len(order_ids)} unpaid orders")
+
+
+def init_app(app):
+    app.cli.add_command(orders_expire_command)
@@ -0,0 +1,72 @@
+import re
+
+from config import Config
+
+BOOKABLE = "status = 'approved' AND is_active = TRUE AND is_open = TRUE"
+
+
+def to_prefix_tsquery(search):
+    # "spice gar" -> "spice:* & gar:*" so partially typed words still match
+    tokens = re.findall(r"\w+", search.lower())
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+# ---------------- HOTEL SEARCH ----------------
+def search_hotels(cur, search, page=1, per_page=None):
+    """Return ``(hotels, has_next)`` for one page of bookable hotels.
+
+    With a search term, rows matching by full-text prefix, substring or
+    trigram word similarity are ranked best first; otherwise hotels are
+    listed by name.
+    """
+    per_page = per_page or Config.SEARCH_PAGE_SIZE
+    offset = (max(page, 1) - 1) * per_page
+
+    tsquery = to_prefix_tsquery(search) if search else ""
+
+    if not tsquery:
+        cur.execute(
+            f"""
+            SELECT id, hotel_name, location, phone, profile_image
+            FROM hotels
+            WHERE {BOOKABLE}
+            ORDER BY hotel_name, id
+            LIMIT %s OFFSET %s
+            """,
+            (per_page + 1, offset),
+        )
+    else:
+        term = search.strip()
+        pattern = f"%{term}%"
+        cur.execute(
+            f"""
+            SELECT
+                id, hotel_name, location, phone, profile_image,
+                ts_rank(search_vector, q) * 2
+                  + GREATEST(
+                        word_similarity(%(term)s, hotel_name),
+                        word_similarity(%(term)s, location)
+                    ) AS rank
+            FROM hotels, to_tsquery('simple', %(tsquery)s) AS q
+            WHERE {BOOKABLE}
+              AND (
+                    search_vector @@ q
+                    OR hotel_name ILIKE %(pattern)s
+                    OR location ILIKE %(pattern)s
+                    OR %(term)s <%% hotel_name
+                    OR %(term)s <%% location
+                  )
+            ORDER BY rank DESC, hotel_name, id
+            LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            {
+                "term": term,
+                "tsquery": tsquery,
+                "pattern": pattern,
+                "limit": per_page + 1,
+                "offset": offset,
+            },
+        )
+
+    hotels = cur.fetchall()
+    return hotels[:per_page], len(hotels) > per_page
@@ -0,0 +1,283 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+
+from app.models.db import get_db_connection
+from app.services.qr import qr_value
+from benchmarks.seed import BENCH_DOMAIN, BENCH_PASSWORD
+
+# Drives the order lifecycle against a running server:
+#   python -m benchmarks.run --url http://127.0.0.1:8000 --users 32 --duration 60
+# Each virtual customer registers, logs in, then loops
+#   browse hotels -> open menu -> place order (COD) -> kitchen lists orders
+#   -> kitchen completes the order
+# and the report gives p50/p95/p99 latency and requests/sec per endpoint.
+
+
+# ---------------- RESULTS ----------------
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # endpoint -> [seconds]
+        self._errors = {}  # endpoint -> count
+
+    def add(self, endpoint, seconds, ok):
+        with self._lock:
+            self._samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed):
+        rows = {}
+        for endpoint, samples in sorted(self._samples.items()):
+            samples = sorted(samples)
+            rows[endpoint] = {
+                "count": len(samples),
+                "errors": self._errors.get(endpoint, 0),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": round(samples[-1] * 1000, 2),
+            }
+        return rows
+
+
+def percentile(sorted_samples, pct):
+    # Nearest-rank percentile, in milliseconds
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return round(sorted_samples[int(rank) - 1] * 1000, 2)
+
+
+# ---------------- TARGETS ----------------
+def load_targets():
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute(
+            """
+            SELECT h.id, l.email, array_agg(m.id ORDER BY m.id) AS menu_ids
+            FROM hotels h
+            JOIN logins l ON l.id = h.login_id
+            JOIN menus m ON m.hotel_id = h.id
+            WHERE l.email LIKE %s AND h.status = 'approved'
+            GROUP BY h.id, l.email
+            """,
+            (f"%@{BENCH_DOMAIN}",),
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ---------------- VIRTUAL CUSTOMER ----------------
+class Customer(threading.Thread):
+    def __init__(self, base_url, hotels, recorder, deadline, run_id, n):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.hotels = hotels
+        self.recorder = recorder
+        self.deadline = deadline
+        self.email = f"run-{run_id}-{n}@{BENCH_DOMAIN}"
+        self.session = requests.Session()
+        self.kitchens = {}  # hotel_id -> logged-in Session
+        self.failed = None
+
+    def call(self, endpoint, method, path, session=None, **kwargs):
+        session = session or self.session
+        started = time.perf_counter()
+        resp = session.request(
+            method, self.base_url + path, allow_redirects=False, timeout=30, **kwargs
+        )
+        elapsed = time.perf_counter() - started
+        self.recorder.add(endpoint, elapsed, resp.status_code < 400)
+        return resp
+
+    def register_and_login(self):
+        self.call(
+            "auth.register",
+            "POST",
+            "/register",
+            data={
+                "email": self.email,
+                "password": BENCH_PASSWORD,
+                "confirm_password": BENCH_PASSWORD,
+                "role": "user",
+                "user_full_name": "Bench Customer",
+                "user_phone": "8000000000",
+            },
+        )
+        resp = self.call(
+            "auth.login",
+            "POST",
+            "/login",
+            data={"email": self.email, "password": BENCH_PASSWORD},
+        )
+        if not resp.headers.get("Location", "").endswith("/user/dashboard"):
+            raise RuntimeError(f"customer login failed for {self.email}")
+
+    def kitchen(self, hotel):
+        session = self.kitchens.get(hotel["id"])
+        if session is None:
+            session = requests.Session()
+            resp = self.call(
+                "auth.login (hotel)",
+                "POST",
+                "/login",
+                session=session,
+                data={"email": hotel["email"], "password": BENCH_PASSWORD},
+            )
+            if not resp.headers.get("Location", "").endswith("/hotel/dashboard"):
+                raise RuntimeError(f"hotel login failed for {hotel['email']}")
+            self.kitchens[hotel["id"]] = session
+        return session
+
+    def order_once(self):
+        hotel = random.choice(self.hotels)
+
+        self.call("user.hotel_list", "GET", "/user/hotels")
+        self.call("user.menu", "GET", f"/user/menu/{hotel['id']}")
+
+        picks = random.sample(hotel["menu_ids"], min(3, len(hotel["menu_ids"])))
+        items = [{"menu_id": menu_id, "qty": 1} for menu_id in picks]
+        # Spread bookings over the coming month like real reservations
+        scheduled = datetime.now() + timedelta(
+            days=random.randint(1, 30), minutes=random.randrange(0, 1440, 30)
+        )
+        resp = self.call(
+            "user.place_order",
+            "POST",
+            "/user/place-order",
+            headers={"Idempotency-Key": uuid.uuid4().hex},
+            json={
+                "hotel_id": hotel["id"],
+                "items": items,
+                "total_people": 2,
+                "total_amount": 0,
+                "scheduled_time": scheduled.strftime("%Y-%m-%dT%H:%M"),
+                "payment_mode": "cod",
+            },
+        )
+        if resp.status_code != 200 or not resp.json().get("success"):
+            return
+
+        order_id = int(resp.json()["success_url"].rstrip("/").rsplit("/", 1)[-1])
+
+        session = self.kitchen(hotel)
+        self.call("hotel.orders", "GET", "/hotel/orders", session=session)
+        self.call(
+            "hotel.complete_order",
+            "POST",
+            "/hotel/orders/complete",
+            session=session,
+            data={"order_id": order_id, "qr_code": qr_value(order_id)},
+        )
+
+    def run(self):
+        try:
+            self.register_and_login()
+            while time.monotonic() < self.deadline:
+                self.order_once()
+        except Exception as e:
+            self.failed = e
+
+
+# ---------------- REPORT ----------------
+def print_report(rows, elapsed):
+    header = f"{'endpoint':<24}{'count':>8}{'errors':>8}{'rps':>10}"
+    header += f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, r in rows.items():
+        print(
+            f"{endpoint:<24}{r['count']:>8}{r['errors']:>8}{r['rps']:>10}"
+            f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}"
+        )
+    total = sum(r["count"] for r in rows.values())
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+
+
+def regressions(rows, baseline, max_regression):
+    # Endpoints whose p95 grew more than max_regression percent
+    slower = []
+    for endpoint, r in rows.items():
+        before = baseline.get(endpoint)
+        if not before or not before["p95_ms"]:
+            continue
+        growth = (r["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        if growth > max_regression:
+            slower.append((endpoint, before["p95_ms"], r["p95_ms"], growth))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order lifecycle load test")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=16, help="concurrent customers")
+    parser.add_argument("--duration", type=int, default=60, help="seconds")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=20.0,
+        help="fail if any endpoint's p95 grows more than this percent",
+    )
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    hotels = load_targets()
+    if not hotels:
+        sys.exit("No benchmark hotels found; run python -m benchmarks.seed first")
+
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    started = time.monotonic()
+    customers = [
+        Customer(args.url, hotels, recorder, started + args.duration, run_id, n)
+        for n in range(args.users)
+    ]
+    for customer in customers:
+        customer.start()
+    for customer in customers:
+        customer.join()
+    elapsed = time.monotonic() - started
+
+    failed = [c.failed for c in customers if c.failed]
+    for error in failed[:5]:
+        print("CUSTOMER ERROR:", error)
+
+    rows = recorder.report(elapsed)
+    print_report(rows, elapsed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": elapsed, "users": args.users, "endpoints": rows}, f)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["endpoints"]
+        slower = regressions(rows, baseline, args.max_regression)
+        for endpoint, before, after, growth in slower:
+            print(
+                f"REGRESSION: {endpoint} p95 {before}ms -> {after}ms (+{growth:.0f}%)"
+            )
+        if slower:
+            sys.exit(1)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
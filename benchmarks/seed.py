@@ -0,0 +1,227 @@
+import argparse
+
+from werkzeug.security import generate_password_hash
+
+from app.models.db import get_db_connection
+from app.models.migrations import upgrade
+from app.services.analytics import rebuild_rollups
+
+# Seeds a local database with benchmark data:
+#   python -m benchmarks.seed --hotels 50 --menus 30 --users 2000 --orders 100000
+# Every benchmark account uses an "@bench.local" email so --reset can
+# remove exactly what was seeded (rows cascade from logins).
+
+BENCH_DOMAIN = "bench.local"
+BENCH_PASSWORD = "benchpass"
+BENCH_STOCK = 1_000_000  # large enough that runs never sell out
+BENCH_SEATS = 100_000  # likewise for table reservations
+
+
+# ---------------- RESET ----------------
+def reset(cur):
+    cur.execute("DELETE FROM logins WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+    return cur.rowcount
+
+
+# ---------------- SEED ----------------
+def seed_hotels(cur, count, password_hash):
+    cur.execute(
+        """
+        WITH new_logins AS (
+            INSERT INTO logins (email, password_hash, role)
+            SELECT 'hotel-' || n || '@' || %(domain)s, %(hash)s, 'hotel'
+            FROM generate_series(1, %(count)s) AS n
+            RETURNING id, email
+        )
+        INSERT INTO hotels
+            (login_id, hotel_name, owner_name, phone, email, address,
+             location, license_number, status, seating_capacity)
+        SELECT
+            id,
+            'Bench Hotel ' || split_part(email, '@', 1),
+            'Bench Owner',
+            '9000000000',
+            email,
+            'Bench Street',
+            (ARRAY['Kochi', 'Chennai', 'Bengaluru', 'Mumbai', 'Delhi'])[1 + id %% 5],
+            'LIC-' || id,
+            'approved',
+            %(seats)s
+        FROM new_logins
+        """,
+        {
+            "domain": BENCH_DOMAIN,
+            "hash": password_hash,
+            "count": count,
+            "seats": BENCH_SEATS,
+        },
+    )
+
+
+def seed_menus(cur, per_hotel):
+    cur.execute(
+        """
+        INSERT INTO menus (hotel_id, item_name, category, price, available_quantity)
+        SELECT
+            h.id,
+            'Dish ' || n,
+            (ARRAY['Starters', 'Main Course', 'Desserts', 'Drinks'])[1 + n %% 4],
+            50 + (n * 37) %% 450,
+            %(stock)s
+        FROM hotels h
+        JOIN logins l ON l.id = h.login_id
+        CROSS JOIN generate_series(1, %(per_hotel)s) AS n
+        WHERE l.email LIKE %(pattern)s
+        """,
+        {
+            "stock": BENCH_STOCK,
+            "per_hotel": per_hotel,
+            "pattern": f"%@{BENCH_DOMAIN}",
+        },
+    )
+
+
+def seed_users(cur, count, password_hash):
+    cur.execute(
+        """
+        WITH new_logins AS (
+            INSERT INTO logins (email, password_hash, role)
+            SELECT 'user-' || n || '@' || %(domain)s, %(hash)s, 'user'
+            FROM generate_series(1, %(count)s) AS n
+            RETURNING id
+        )
+        INSERT INTO users (login_id, user_full_name, user_phone, is_premium)
+        SELECT id, 'Bench User ' || id, '8000000000', id %% 10 = 0
+        FROM new_logins
+        """,
+        {"domain": BENCH_DOMAIN, "hash": password_hash, "count": count},
+    )
+
+
+def seed_orders(cur, count):
+    # Completed history spread over the last 90 days; each order holds one
+    # to three dishes of its hotel
+    cur.execute(
+        """
+        WITH bench_users AS (
+            SELECT u.id, row_number() OVER (ORDER BY u.id) AS rn
+            FROM users u JOIN logins l ON l.id = u.login_id
+            WHERE l.email LIKE %(pattern)s
+        ),
+        bench_menus AS (
+            SELECT m.id, m.hotel_id, m.item_name, m.price,
+                   row_number() OVER (PARTITION BY m.hotel_id ORDER BY m.id) AS rn,
+                   count(*) OVER (PARTITION BY m.hotel_id) AS per_hotel
+            FROM menus m
+            JOIN hotels h ON h.id = m.hotel_id
+            JOIN logins l ON l.id = h.login_id
+            WHERE l.email LIKE %(pattern)s
+        ),
+        bench_hotels AS (
+            SELECT hotel_id, row_number() OVER (ORDER BY hotel_id) AS rn
+            FROM bench_menus GROUP BY hotel_id
+        ),
+        picks AS (
+            SELECT
+                n,
+                nextval(pg_get_serial_sequence('orders', 'id')) AS order_id,
+                (SELECT id FROM bench_users
+                 WHERE rn = 1 + n %% (SELECT count(*) FROM bench_users)) AS user_id,
+                (SELECT hotel_id FROM bench_hotels
+                 WHERE rn = 1 + n %% (SELECT count(*) FROM bench_hotels)) AS hotel_id,
+                NOW() - (n %% 90) * INTERVAL '1 day' - (n %% 720) * INTERVAL '1 minute'
+                    AS placed_at
+            FROM generate_series(1, %(count)s) AS n
+        ),
+        lines AS (
+            SELECT
+                p.order_id, m.id AS menu_id, m.item_name, m.price,
+                sum(1 + (p.n + k) %% 3) AS qty
+            FROM picks p
+            CROSS JOIN generate_series(0, p.n %% 3) AS k
+            JOIN bench_menus m
+              ON m.hotel_id = p.hotel_id
+             AND m.rn = 1 + (p.n * 7 + k) %% m.per_hotel
+            GROUP BY p.order_id, m.id, m.item_name, m.price
+        ),
+        totals AS (
+            SELECT order_id, sum(price * qty) AS total
+            FROM lines GROUP BY order_id
+        ),
+        new_orders AS (
+            INSERT INTO orders
+                (id, user_id, hotel_id, total_people, total_amount, scheduled_time,
+                 payment_mode, order_status, qr_code, order_time, created_at)
+            SELECT
+                p.order_id, p.user_id, p.hotel_id, 1 + p.n %% 4, t.total,
+                p.placed_at, (ARRAY['cod', 'online'])[1 + p.n %% 2], 'completed',
+                'SEEDED', p.placed_at, p.placed_at
+            FROM picks p JOIN totals t ON t.order_id = p.order_id
+            RETURNING id
+        )
+        INSERT INTO order_items (order_id, menu_id, item_name, qty, unit_price)
+        SELECT l.order_id, l.menu_id, l.item_name, l.qty, l.price
+        FROM lines l
+        JOIN new_orders o ON o.id = l.order_id
+        """,
+        {"pattern": f"%@{BENCH_DOMAIN}", "count": count},
+    )
+
+
+def seed(hotels, menus, users, orders):
+    # Hash once: the benchmark measures the app, not seeding
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        seed_hotels(cur, hotels, password_hash)
+        seed_menus(cur, menus)
+        seed_users(cur, users, password_hash)
+        if orders:
+            seed_orders(cur, orders)
+            rebuild_rollups(cur)
+        cur.execute("ANALYZE")
+        conn.commit()
+
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed benchmark data")
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--menus", type=int, default=30, help="menu items per hotel")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=100000, help="history orders")
+    parser.add_argument(
+        "--reset", action="store_true", help="remove previous benchmark data first"
+    )
+    args = parser.parse_args()
+
+    print("Migrations applied:", upgrade() or "none")
+
+    if args.reset:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            print("Removed benchmark logins:", reset(cur))
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+
+    seed(args.hotels, args.menus, args.users, args.orders)
+    print(
+        f"Seeded {args.hotels} hotels x {args.menus} menus, "
+        f"{args.users} users, {args.orders} orders"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,102 @@ class Config:
     DB_PASSWORD = "tron"  # pgAdmin password
     DB_HOST = "localhost"
     DB_PORT = "5432"
+
+    # Connection pool (per process)
+    DB_POOL_MIN = 1
+    DB_POOL_MAX = 10
+    DB_POOL_TIMEOUT = 10  # seconds to wait for a free connection
+    DB_POOL_MAX_LIFETIME = 1800  # recycle connections older than this
+    DB_POOL_HEALTH_CHECK_INTERVAL = 30  # ping connections idle longer than this
+
+    # Background QR rendering
+    QR_WORKERS = 2
+    QR_QUEUE_SIZE = 256
+    QR_CACHE_SIZE = 1024  # rendered PNGs kept in memory
+    QR_RENDER_RETRIES = 3  # retries after a failed background render
+    QR_RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled each time
+
+    # Admin list pagination
+    ADMIN_PAGE_SIZE = 50
+    ADMIN_PAGE_SIZE_MAX = 500
+
+    # Streaming exports (rows fetched per server-side cursor round trip)
+    EXPORT_BATCH_SIZE = 2000
+
+    # Admin dashboard counters cache
+    DASHBOARD_CACHE_TTL = 60  # seconds
+
+    # Restaurant search
+    SEARCH_PAGE_SIZE = 24
+
+    # Shared cache backend, e.g. "redis://localhost:6379/0" (in-process if None)
+    CACHE_REDIS_URL = None
+
+    # Customer menu cache
+    MENU_CACHE_SIZE = 512  # hotels
+    MENU_CACHE_TTL = 600  # seconds; writes invalidate sooner
+    # Without CACHE_REDIS_URL an invalidation only clears the writing
+    # process; other workers show the old menu until this TTL instead
+    MENU_CACHE_LOCAL_TTL = 30  # seconds
+    MENU_STOCK_TTL = 5  # seconds available_quantity may lag behind
+
+    # Identity flags (is_premium, hotel status) cached per user/hotel
+    IDENTITY_CACHE_SIZE = 10000
+    IDENTITY_CACHE_TTL = 30  # seconds
+
+    # Live kitchen order feed (SSE)
+    ORDER_FEED_HEARTBEAT = 15  # seconds between keep-alive comments
+    ORDER_FEED_QUEUE_SIZE = 100  # pending events per connected screen
+    ORDER_FEED_RECONNECT_DELAY = 3  # seconds before re-LISTENing after an error
+    # Under gunicorn (gthread) an open stream holds a request thread for as
+    # long as the screen is open, so each worker serves at most this many
+    # and keeps its other WEB_THREADS for requests. Further screens fall
+    # back to reloading every ORDER_FEED_BUSY_RELOAD seconds. The ASGI mode
+    # (uvicorn asgi:app) serves streams as coroutines, without this cap.
+    ORDER_FEED_MAX_STREAMS = 2
+    ORDER_FEED_BUSY_RELOAD = 30
+
+    # ASGI mode (asyncpg pool used by the async endpoints)
+    ASYNC_DB_POOL_MIN = 2
+    ASYNC_DB_POOL_MAX = 20
+
+    # Production server (gunicorn -c gunicorn.conf.py wsgi:app)
+    WEB_BIND = "0.0.0.0:8000"
+    WEB_WORKERS = None  # None -> 2 * CPU cores + 1
+    WEB_THREADS = 4  # request threads per worker
+    WEB_TIMEOUT = 60  # seconds before a silent worker is restarted
+    WEB_GRACEFUL_TIMEOUT = 30  # seconds in-flight requests get on reload/stop
+    WEB_MAX_REQUESTS = 5000  # recycle workers after this many requests (0 = never)
+    # Postgres connections shared by all workers. Each worker also holds one
+    # unpooled LISTEN connection for the order feed; that one is subtracted
+    # before the rest is split into per-worker pools.
+    DB_MAX_CONNECTIONS = 80
+
+    # /metrics is served to these addresses, or to requests sending
+    # "Authorization: Bearer <METRICS_TOKEN>" (behind a proxy, use the token)
+    METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+    METRICS_TOKEN = None
+
+    # Per-request SQL instrumentation (logged as JSON on the "app.sql" logger)
+    SQL_INSTRUMENTATION = True
+    SQL_LOG_LEVEL = "INFO"  # WARNING logs only slow queries and N+1 requests
+    SQL_SLOW_QUERY_MS = 200  # log individual statements slower than this
+    SQL_N_PLUS_ONE_THRESHOLD = 10  # same statement this many times per request
+
+    # Table reservations (in-memory slot availability index per process)
+    SLOT_INDEX_TTL = 30  # seconds before a hotel's slots are reloaded
+    UNPAID_ORDER_TTL_MINUTES = 30  # unpaid online orders then release their seats
+
+    # Kitchen priority queue (hotel.orders)
+    KITCHEN_PREMIUM_BOOST_MINUTES = 15  # premium orders are due this much sooner
+    KITCHEN_QUEUE_TTL = 300  # seconds; full reload as a backstop to events
+
+    # Uploaded images (content-hashed originals + resized JPEG/WebP variants)
+    IMAGE_WORKERS = 2  # background threads rendering variants per process
+    IMAGE_QUALITY = 80
+    IMAGE_CACHE_MAX_AGE = 31536000  # seconds; hashed upload URLs never change
+
+    # Static CSS/JS bundles (flask assets-build; served from /assets/)
+    ASSETS_AUTO_BUILD = None  # rebuild at startup if stale; None: only in debug
+    ASSETS_KEEP_BUILDS = 3  # outputs kept per bundle for pages of older deploys
+    ASSETS_CACHE_MAX_AGE = 31536000  # seconds; bundle names carry a content hash
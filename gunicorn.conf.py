@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+
+from config import Config
+
+# Production launcher:  gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Deploy steps before starting (or USR2-upgrading) the new code:
+#   flask db upgrade && flask assets-build
+#
+#   kill -HUP <master>    graceful restart of the workers (new settings)
+#   kill -USR2 <master>   start a new master with new code, then
+#   kill -QUIT <old>      drain and stop the old one (needed with preload_app)
+#
+# Export PROMETHEUS_MULTIPROC_DIR=<empty dir> so /metrics sums all workers.
+#
+# Live kitchen screens (/hotel/orders/stream) each hold a request thread;
+# at most ORDER_FEED_MAX_STREAMS per worker, see config.py. Sites with many
+# screens should serve the app with uvicorn asgi:app instead.
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS or multiprocessing.cpu_count() * 2 + 1
+threads = Config.WEB_THREADS
+worker_class = "gthread"
+
+# Import create_app() once in the master; workers share it copy-on-write
+preload_app = True
+
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS // 10
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+# ---------------- PER-WORKER DB POOL ----------------
+def worker_pool_size(workers):
+    # Split the server-wide connection budget across workers, capped by the
+    # usual per-process limit. One connection per worker is its order feed
+    # LISTEN, which lives outside the pool.
+    size = max(1, Config.DB_MAX_CONNECTIONS // workers - 1)
+    return min(size, Config.DB_POOL_MAX)
+
+
+def post_fork(server, worker):
+    # Runs in the fresh worker before it serves anything; the pool, QR
+    # workers and order feed are created lazily per pid after this
+    size = worker_pool_size(server.cfg.workers)
+    Config.DB_POOL_MAX = size
+    Config.DB_POOL_MIN = min(Config.DB_POOL_MIN, size)
+    server.log.info("Worker %s: DB pool max %s", worker.pid, size)
+    if size < server.cfg.threads:
+        server.log.warning(
+            "DB pool (%s) is smaller than threads per worker (%s); "
+            "requests may wait for a connection",
+            size,
+            server.cfg.threads,
+        )
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the /metrics aggregate
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    from app.models.db import close_pool
+
+    close_pool()
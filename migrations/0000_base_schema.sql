@@ -0,0 +1,81 @@
+-- Baseline schema the application was built against. Every statement is
+-- idempotent so existing databases can adopt the migration runner as-is.
+
+CREATE TABLE IF NOT EXISTS logins (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role VARCHAR(20) NOT NULL CHECK (role IN ('admin', 'user', 'hotel')),
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    login_id INTEGER NOT NULL UNIQUE REFERENCES logins(id) ON DELETE CASCADE,
+    user_full_name VARCHAR(150) NOT NULL,
+    user_phone VARCHAR(20),
+    user_address TEXT,
+    is_premium BOOLEAN NOT NULL DEFAULT FALSE,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS hotels (
+    id SERIAL PRIMARY KEY,
+    login_id INTEGER NOT NULL UNIQUE REFERENCES logins(id) ON DELETE CASCADE,
+    hotel_name VARCHAR(150) NOT NULL,
+    owner_name VARCHAR(150) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    email VARCHAR(255),
+    address TEXT NOT NULL,
+    location VARCHAR(150) NOT NULL,
+    license_number VARCHAR(100) NOT NULL,
+    license_document TEXT,
+    profile_image TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    admin_remark TEXT,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    is_open BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS menus (
+    id SERIAL PRIMARY KEY,
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    item_name VARCHAR(150) NOT NULL,
+    category VARCHAR(100),
+    price NUMERIC(10, 2) NOT NULL,
+    available_quantity INTEGER NOT NULL DEFAULT 0,
+    image TEXT,
+    is_available BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    total_people INTEGER NOT NULL DEFAULT 1,
+    total_amount NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    scheduled_time TIMESTAMP,
+    items JSONB NOT NULL DEFAULT '[]',
+    payment_mode VARCHAR(20) NOT NULL,
+    order_status VARCHAR(20) NOT NULL,
+    qr_code TEXT,
+    qr_image_url TEXT,
+    feedback_given BOOLEAN NOT NULL DEFAULT FALSE,
+    is_late BOOLEAN NOT NULL DEFAULT FALSE,
+    order_time TIMESTAMP NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS feedbacks (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    rating INTEGER NOT NULL CHECK (rating BETWEEN 1 AND 5),
+    feedback_text TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
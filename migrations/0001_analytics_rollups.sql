@@ -0,0 +1,27 @@
+-- Pre-aggregated analytics, maintained incrementally when orders complete.
+
+CREATE TABLE IF NOT EXISTS analytics_hotel_hourly (
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    hour SMALLINT NOT NULL,
+    orders INTEGER NOT NULL DEFAULT 0,
+    covers INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (hotel_id, day, hour)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_hotel_hourly_day
+    ON analytics_hotel_hourly (day);
+
+CREATE TABLE IF NOT EXISTS analytics_dish_daily (
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    menu_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    item_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (hotel_id, menu_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analytics_dish_daily_day
+    ON analytics_dish_daily (day);
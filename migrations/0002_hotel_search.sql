@@ -0,0 +1,29 @@
+-- Indexed restaurant search for user.hotel_list: full-text (prefix) matching
+-- plus trigram indexes for substring and typo-tolerant matching.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE hotels
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', COALESCE(hotel_name, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(location, '')), 'B')
+    ) STORED;
+
+-- Only bookable hotels are ever searched
+CREATE INDEX IF NOT EXISTS idx_hotels_search_vector
+    ON hotels USING GIN (search_vector)
+    WHERE status = 'approved' AND is_active AND is_open;
+
+CREATE INDEX IF NOT EXISTS idx_hotels_name_trgm
+    ON hotels USING GIN (hotel_name gin_trgm_ops)
+    WHERE status = 'approved' AND is_active AND is_open;
+
+CREATE INDEX IF NOT EXISTS idx_hotels_location_trgm
+    ON hotels USING GIN (location gin_trgm_ops)
+    WHERE status = 'approved' AND is_active AND is_open;
+
+-- Unfiltered browsing is ordered by name
+CREATE INDEX IF NOT EXISTS idx_hotels_bookable_name
+    ON hotels (hotel_name, id)
+    WHERE status = 'approved' AND is_active AND is_open;
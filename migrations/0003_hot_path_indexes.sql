@@ -0,0 +1,37 @@
+-- Indexes for the hottest route queries (see `flask db explain`).
+
+-- hotel.orders: open orders for one hotel, newest first
+CREATE INDEX IF NOT EXISTS idx_orders_hotel_open_time
+    ON orders (hotel_id, order_time DESC)
+    WHERE order_status <> 'completed';
+
+-- user.my_orders: a user's active / awaiting-feedback orders
+CREATE INDEX IF NOT EXISTS idx_orders_user_status_feedback
+    ON orders (user_id, order_status, feedback_given);
+
+-- admin.orders keyset pagination
+CREATE INDEX IF NOT EXISTS idx_orders_time_id
+    ON orders (order_time DESC, id DESC);
+
+-- user.menu / stock lookups: available items of one hotel in display order
+CREATE INDEX IF NOT EXISTS idx_menus_hotel_available
+    ON menus (hotel_id, category, item_name)
+    WHERE is_available;
+
+-- hotel.complete_order legacy name matching
+CREATE INDEX IF NOT EXISTS idx_menus_hotel_item_name
+    ON menus (hotel_id, LOWER(TRIM(item_name)));
+
+-- hotel.feedbacks: one hotel's feedback, newest first
+CREATE INDEX IF NOT EXISTS idx_feedbacks_hotel_created
+    ON feedbacks (hotel_id, created_at DESC);
+
+-- admin.feedbacks / hotels / users keyset pagination
+CREATE INDEX IF NOT EXISTS idx_feedbacks_created_id
+    ON feedbacks (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_hotels_created_id
+    ON hotels (created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_users_created_id
+    ON users (created_at DESC, id DESC);
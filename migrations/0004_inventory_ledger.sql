@@ -0,0 +1,25 @@
+-- One row per (order, menu item) stock movement; the primary key makes
+-- applying an order's stock change idempotent.
+
+CREATE TABLE IF NOT EXISTS inventory_ledger (
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    menu_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,  -- negative = taken from stock
+    reason VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (order_id, menu_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_inventory_ledger_menu
+    ON inventory_ledger (menu_id, created_at);
+
+-- Confirmed orders (qr_code is set in the confirm transaction) already had
+-- their stock decremented; record that so completion does not repeat it.
+INSERT INTO inventory_ledger (order_id, menu_id, quantity, reason)
+SELECT o.id, (i->>'menu_id')::int, -SUM((i->>'qty')::int), 'backfill'
+FROM orders o
+CROSS JOIN LATERAL jsonb_array_elements(o.items::jsonb) AS i
+WHERE o.qr_code IS NOT NULL
+  AND i ? 'menu_id'
+GROUP BY o.id, (i->>'menu_id')::int
+ON CONFLICT (order_id, menu_id) DO NOTHING;
@@ -0,0 +1,35 @@
+-- Publish order lifecycle changes on the order_events channel for the
+-- live kitchen feed. NOTIFY is delivered only when the transaction commits.
+
+CREATE OR REPLACE FUNCTION notify_order_event() RETURNS trigger AS $$
+DECLARE
+    event TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        event := 'placed';
+    ELSIF NEW.order_status = 'completed'
+          AND OLD.order_status IS DISTINCT FROM 'completed' THEN
+        event := 'completed';
+    ELSIF NEW.qr_code IS NOT NULL AND OLD.qr_code IS NULL THEN
+        event := 'confirmed';
+    ELSE
+        RETURN NEW;
+    END IF;
+
+    PERFORM pg_notify(
+        'order_events',
+        json_build_object(
+            'event', event,
+            'order_id', NEW.id,
+            'hotel_id', NEW.hotel_id
+        )::text
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS orders_notify_event ON orders;
+
+CREATE TRIGGER orders_notify_event
+    AFTER INSERT OR UPDATE OF order_status, qr_code ON orders
+    FOR EACH ROW EXECUTE FUNCTION notify_order_event();
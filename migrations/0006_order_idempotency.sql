@@ -0,0 +1,9 @@
+-- Client-supplied idempotency keys for order placement. A retried or
+-- double-submitted /user/place-order with the same key maps back to the
+-- order the first attempt created.
+
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_user_idempotency_key
+    ON orders (user_id, idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
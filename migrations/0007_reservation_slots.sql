@@ -0,0 +1,57 @@
+-- Table capacity per hotel and seats booked per time slot. A booking
+-- occupies every slot its dining time overlaps; slot_bookings rows are
+-- only ever raised through a conditional upsert that stays within
+-- seating_capacity, so the database remains the source of truth.
+
+ALTER TABLE hotels
+    ADD COLUMN IF NOT EXISTS seating_capacity INTEGER NOT NULL DEFAULT 40
+        CHECK (seating_capacity > 0),
+    ADD COLUMN IF NOT EXISTS slot_minutes INTEGER NOT NULL DEFAULT 30
+        CHECK (slot_minutes > 0 AND 1440 % slot_minutes = 0),
+    ADD COLUMN IF NOT EXISTS dining_minutes INTEGER NOT NULL DEFAULT 90
+        CHECK (dining_minutes > 0);
+
+CREATE TABLE IF NOT EXISTS slot_bookings (
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    slot_start TIMESTAMP NOT NULL,
+    seats_booked INTEGER NOT NULL CHECK (seats_booked >= 0),
+    PRIMARY KEY (hotel_id, slot_start)
+);
+
+CREATE TABLE IF NOT EXISTS reservations (
+    order_id INTEGER PRIMARY KEY REFERENCES orders(id) ON DELETE CASCADE,
+    hotel_id INTEGER NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+    slot_start TIMESTAMP NOT NULL,
+    slot_count INTEGER NOT NULL,
+    people INTEGER NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Upcoming orders already hold their tables; record them (without a
+-- capacity check, existing overbookings are kept as they are).
+INSERT INTO reservations (order_id, hotel_id, slot_start, slot_count, people)
+SELECT
+    o.id,
+    o.hotel_id,
+    date_trunc('day', o.scheduled_time)
+        + floor(extract(epoch FROM o.scheduled_time - date_trunc('day', o.scheduled_time))
+                / 60 / h.slot_minutes) * h.slot_minutes * INTERVAL '1 minute',
+    ceil(h.dining_minutes::numeric / h.slot_minutes)::int,
+    o.total_people
+FROM orders o
+JOIN hotels h ON h.id = o.hotel_id
+WHERE o.scheduled_time >= CURRENT_DATE
+  AND o.order_status != 'completed'
+ON CONFLICT (order_id) DO NOTHING;
+
+INSERT INTO slot_bookings (hotel_id, slot_start, seats_booked)
+SELECT r.hotel_id, s.slot_start, SUM(r.people)
+FROM reservations r
+JOIN hotels h ON h.id = r.hotel_id
+CROSS JOIN LATERAL generate_series(
+    r.slot_start,
+    r.slot_start + (r.slot_count - 1) * h.slot_minutes * INTERVAL '1 minute',
+    h.slot_minutes * INTERVAL '1 minute'
+) AS s(slot_start)
+GROUP BY r.hotel_id, s.slot_start
+ON CONFLICT (hotel_id, slot_start) DO NOTHING;
@@ -0,0 +1,39 @@
+-- One row per dish of an order, replacing the orders.items JSONB array.
+-- menu_id has no foreign key (like inventory_ledger): deleting a menu item
+-- must not rewrite order history, so the name is kept alongside.
+
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    menu_id INTEGER NOT NULL,
+    item_name VARCHAR(150) NOT NULL,
+    qty INTEGER NOT NULL CHECK (qty > 0),
+    unit_price NUMERIC(10, 2) NOT NULL,
+    PRIMARY KEY (order_id, menu_id)
+);
+
+-- Dish-level reports (sales per menu item)
+CREATE INDEX IF NOT EXISTS idx_order_items_menu
+    ON order_items (menu_id);
+
+-- Copy existing carts; repeated lines of one dish are merged. Lines with
+-- a null menu_id or qty are skipped; a missing name or price is kept as
+-- '' / 0 rather than failing the migration.
+INSERT INTO order_items (order_id, menu_id, item_name, qty, unit_price)
+SELECT
+    o.id,
+    (i->>'menu_id')::int,
+    COALESCE(MAX(i->>'name'), ''),
+    SUM((i->>'qty')::int),
+    COALESCE(MAX((i->>'price')::numeric), 0)
+FROM orders o
+CROSS JOIN LATERAL jsonb_array_elements(o.items::jsonb) AS i
+WHERE i->>'menu_id' IS NOT NULL
+  AND i->>'qty' IS NOT NULL
+GROUP BY o.id, (i->>'menu_id')::int
+HAVING SUM((i->>'qty')::int) > 0
+ON CONFLICT (order_id, menu_id) DO NOTHING;
+
+-- No longer read, but place_order still writes the same lines here so a
+-- rollback to the previous release sees every order. Stop writing it and
+-- drop it in a later migration.
+COMMENT ON COLUMN orders.items IS 'deprecated: see order_items (still dual-written)';
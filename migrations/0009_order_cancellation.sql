@@ -0,0 +1,38 @@
+-- Online orders that are never paid are cancelled (flask orders-expire);
+-- publish that on order_events so kitchen screens drop them like a
+-- completed order.
+
+CREATE OR REPLACE FUNCTION notify_order_event() RETURNS trigger AS $$
+DECLARE
+    event TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        event := 'placed';
+    ELSIF NEW.order_status = 'completed'
+          AND OLD.order_status IS DISTINCT FROM 'completed' THEN
+        event := 'completed';
+    ELSIF NEW.order_status = 'cancelled'
+          AND OLD.order_status IS DISTINCT FROM 'cancelled' THEN
+        event := 'cancelled';
+    ELSIF NEW.qr_code IS NOT NULL AND OLD.qr_code IS NULL THEN
+        event := 'confirmed';
+    ELSE
+        RETURN NEW;
+    END IF;
+
+    PERFORM pg_notify(
+        'order_events',
+        json_build_object(
+            'event', event,
+            'order_id', NEW.id,
+            'hotel_id', NEW.hotel_id
+        )::text
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Finding unpaid online orders past their payment window
+CREATE INDEX IF NOT EXISTS idx_orders_unpaid
+    ON orders (created_at)
+    WHERE payment_mode = 'online' AND qr_code IS NULL AND order_status = 'paid';
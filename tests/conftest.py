@@ -0,0 +1,78 @@
+import asyncio
+import re
+
+import pytest
+
+from app import create_app
+
+# The suite runs without PostgreSQL: database calls are replaced by the
+# small fakes below, which also check that every $n placeholder of an
+# asyncpg query gets exactly one bind argument.
+
+
+@pytest.fixture(scope="session")
+def flask_app():
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+def session_cookie(flask_app, data):
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    name = flask_app.config["SESSION_COOKIE_NAME"]
+    return f"{name}={serializer.dumps(data)}"
+
+
+def check_binds(query, args):
+    placeholders = {int(n) for n in re.findall(r"\$(\d+)", query)}
+    assert placeholders == set(range(1, len(args) + 1)), (query, args)
+    for arg in args:
+        assert not isinstance(arg, (list, tuple)), (query, args)
+
+
+class FakeAsyncPool:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.calls = []
+
+    async def fetchrow(self, query, *args):
+        check_binds(query, args)
+        self.calls.append((query, args))
+        return self.rows.pop(0) if self.rows else None
+
+    async def fetchval(self, query, *args):
+        row = await self.fetchrow(query, *args)
+        return None if row is None else next(iter(row.values()))
+
+
+def call_asgi(app, path, cookie=None, method="GET"):
+    """Run one HTTP request through an ASGI app; returns (status, headers, body)."""
+    headers = [(b"host", b"localhost")]
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("localhost", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], dict(start["headers"]), body
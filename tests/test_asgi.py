@@ -0,0 +1,309 @@
+import asyncio
+import json
+
+import pytest
+
+import app.asgi as asgi
+from config import Config
+from app.models.aio_db import to_asyncpg
+from app.services.inventory import ORDER_STOCK_SQL, order_stock_params
+from app.services.order_feed import KITCHEN_ORDER_SELECT
+from tests.conftest import FakeAsyncPool, call_asgi, check_binds, session_cookie
+
+
+@pytest.fixture
+def asgi_app(flask_app, monkeypatch):
+    monkeypatch.setattr(asgi, "create_app", lambda: flask_app)
+    return asgi.create_asgi_app()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakeAsyncPool()
+
+    async def get_pool():
+        return fake
+
+    monkeypatch.setattr(asgi, "get_async_pool", get_pool)
+    return fake
+
+
+def user_cookie(flask_app, user_id=5):
+    return session_cookie(flask_app, {"role": "user", "user_id": user_id})
+
+
+# ---------------- to_asyncpg ----------------
+def test_to_asyncpg_positional():
+    query, args = to_asyncpg("SELECT * FROM t WHERE a = %s AND b = %s", (1, "x"))
+    assert query == "SELECT * FROM t WHERE a = $1 AND b = $2"
+    assert args == [1, "x"]
+
+
+def test_to_asyncpg_named_params_are_bound_once():
+    query, args = to_asyncpg(
+        "SELECT %(a)s, %(b)s, %(a)s::int, 5 %% 2", {"a": 1, "b": 2, "unused": 3}
+    )
+    assert query == "SELECT $1, $2, $1::int, 5 % 2"
+    assert args == [1, 2]
+
+
+def test_to_asyncpg_shared_queries():
+    for query, params in (
+        (KITCHEN_ORDER_SELECT + " WHERE o.id = %s", (7,)),
+        (ORDER_STOCK_SQL, order_stock_params(7, "confirm")),
+    ):
+        check_binds(*to_asyncpg(query, params))
+
+
+# ---------------- payment_success ----------------
+def test_payment_success_confirms_through_shared_code(
+    flask_app, asgi_app, pool, monkeypatch
+):
+    confirmed = []
+    monkeypatch.setattr(asgi, "process_confirmed_order", confirmed.append)
+    pool.rows = [{"qr_code": None, "order_status": "paid"}]
+
+    status, headers, _ = call_asgi(
+        asgi_app, "/user/payment-success/9", user_cookie(flask_app)
+    )
+
+    assert status == 302
+    assert headers[b"location"] == b"/user/order-success/9"
+    assert confirmed == [9]
+    assert pool.calls[0][1] == (9, 5)
+
+
+def test_payment_success_repeat_does_not_confirm_again(
+    flask_app, asgi_app, pool, monkeypatch
+):
+    confirmed = []
+    monkeypatch.setattr(asgi, "process_confirmed_order", confirmed.append)
+    pool.rows = [{"qr_code": "ORDER_ID:9", "order_status": "paid"}]
+
+    status, _, _ = call_asgi(
+        asgi_app, "/user/payment-success/9", user_cookie(flask_app)
+    )
+
+    assert status == 302
+    assert confirmed == []
+
+
+def test_payment_success_failure_is_a_500(flask_app, asgi_app, pool, monkeypatch):
+    def fail(order_id):
+        raise Exception("Item unavailable")
+
+    monkeypatch.setattr(asgi, "process_confirmed_order", fail)
+    pool.rows = [{"qr_code": None, "order_status": "paid"}]
+
+    status, _, _ = call_asgi(
+        asgi_app, "/user/payment-success/9", user_cookie(flask_app)
+    )
+    assert status == 500
+
+
+def test_payment_success_after_expiry_is_gone(flask_app, asgi_app, pool, monkeypatch):
+    confirmed = []
+    monkeypatch.setattr(asgi, "process_confirmed_order", confirmed.append)
+    pool.rows = [{"qr_code": None, "order_status": "cancelled"}]
+
+    status, _, _ = call_asgi(
+        asgi_app, "/user/payment-success/9", user_cookie(flask_app)
+    )
+    assert status == 410
+    assert confirmed == []
+
+
+def test_payment_success_other_users_order(flask_app, asgi_app, pool):
+    status, _, _ = call_asgi(
+        asgi_app, "/user/payment-success/9", user_cookie(flask_app)
+    )
+    assert status == 404
+
+
+# ---------------- order_qr_status ----------------
+def test_order_qr_status(flask_app, asgi_app, pool):
+    pool.rows = [{"qr_code": "ORDER_ID:9", "qr_image_url": "/user/qr/9.png"}]
+
+    status, _, body = call_asgi(asgi_app, "/user/order-qr/9", user_cookie(flask_app))
+
+    assert status == 200
+    assert json.loads(body) == {"ready": True, "qr_url": "/user/qr/9.png"}
+    assert pool.calls[0][1] == (9, 5)
+
+
+def test_order_qr_status_renders_when_nothing_pending(
+    flask_app, asgi_app, pool, monkeypatch
+):
+    monkeypatch.setattr(asgi, "ensure_qr", lambda order_id: f"/user/qr/{order_id}.png")
+    pool.rows = [{"qr_code": "ORDER_ID:9", "qr_image_url": None}]
+
+    _, _, body = call_asgi(asgi_app, "/user/order-qr/9", user_cookie(flask_app))
+    assert json.loads(body)["ready"] is True
+
+
+# ---------------- AsyncOrderFeed ----------------
+KITCHEN_ROW = {
+    "id": 9,
+    "user_id": 5,
+    "user_full_name": "Asha",
+    "user_phone": "9000000000",
+    "is_premium": False,
+    "payment_mode": "cod",
+    "total_people": 2,
+    "total_amount": 120,
+    "order_status": "preparing",
+    "order_time": None,
+    "scheduled_time": None,
+    "qr_code": None,
+    "items": [{"menu_id": 3, "name": "Dosa", "qty": 2, "price": 60.0}],
+}
+
+
+class FakeListenConnection:
+    def __init__(self):
+        self.closed = False
+        self.on_terminate = []
+
+    def add_termination_listener(self, callback):
+        self.on_terminate.append(callback)
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        for callback in self.on_terminate:
+            callback(self)
+
+    async def close(self):
+        self.closed = True
+
+    async def fetchval(self, query):
+        return 1
+
+
+@pytest.fixture
+def listen(monkeypatch):
+    opened = []
+
+    async def connect():
+        opened.append(FakeListenConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(asgi, "get_async_listen_connection", connect)
+    monkeypatch.setattr(Config, "ORDER_FEED_RECONNECT_DELAY", 0)
+    return opened
+
+
+def test_feed_pushes_new_orders(flask_app, pool, listen):
+    pool.rows = [KITCHEN_ROW]
+
+    async def run():
+        feed = asgi.AsyncOrderFeed(flask_app)
+        events = await feed.subscribe(1)
+        await feed._dispatch({"event": "new", "order_id": 9, "hotel_id": 1})
+        await feed.close()
+        return events.get_nowait()
+
+    message = asyncio.run(run())
+    assert message["event"] == "new"
+    assert "Dosa" in message["html"]
+    assert pool.calls[0][1] == (9,)
+
+
+def test_feed_removes_cancelled_orders_without_fetching(flask_app, pool, listen):
+    async def run():
+        feed = asgi.AsyncOrderFeed(flask_app)
+        events = await feed.subscribe(1)
+        await feed._dispatch({"event": "cancelled", "order_id": 9, "hotel_id": 1})
+        await feed.close()
+        return events.get_nowait()
+
+    assert asyncio.run(run()) == {"event": "cancelled", "order_id": 9}
+    assert pool.calls == []
+
+
+def test_feed_reconnects_and_resyncs_after_drop(flask_app, listen):
+    async def run():
+        feed = asgi.AsyncOrderFeed(flask_app)
+        events = await feed.subscribe(1)
+        listen[0].terminate()
+        message = await asyncio.wait_for(events.get(), timeout=1)
+        await feed.close()
+        return message
+
+    assert asyncio.run(run()) == {"event": "resync"}
+    assert len(listen) == 2
+    assert listen[1].closed  # closed by feed.close(), not left dangling
+
+
+def test_feed_close_does_not_reconnect(flask_app, listen):
+    async def run():
+        feed = asgi.AsyncOrderFeed(flask_app)
+        await feed.subscribe(1)
+        await feed.close()
+        listen[0].terminate()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert len(listen) == 1
+
+
+# ---------------- orders_stream ----------------
+class FakeFeed:
+    def __init__(self):
+        self.subscribed = []
+
+    async def subscribe(self, hotel_id):
+        self.subscribed.append(hotel_id)
+        return asyncio.Queue()
+
+    def unsubscribe(self, hotel_id, q):
+        pass
+
+
+def open_stream(flask_app, session, monkeypatch):
+    monkeypatch.setattr(Config, "ORDER_FEED_HEARTBEAT", 0.01)
+    feed = FakeFeed()
+    cookie = session_cookie(flask_app, session).encode()
+    scope = {"type": "http", "headers": [(b"cookie", cookie)]}
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(0.02)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.orders_stream(flask_app, feed, scope, receive, send))
+    return sent[0]["status"], feed.subscribed
+
+
+@pytest.mark.parametrize(
+    "session",
+    [
+        {"role": "hotel", "hotel_id": 3},
+        # Logged in before hotel_id was stored in the session
+        {"role": "hotel", "login_id": "spice"},
+    ],
+)
+def test_orders_stream_resolves_the_hotel(flask_app, pool, monkeypatch, session):
+    pool.rows = [{"id": 3, "status": "approved"}]
+
+    status, subscribed = open_stream(flask_app, session, monkeypatch)
+
+    assert status == 200
+    assert subscribed == [3]
+    assert pool.calls[0][1] == (session.get("hotel_id") or "spice",)
+
+
+def test_orders_stream_rejects_unapproved_hotels(flask_app, pool, monkeypatch):
+    pool.rows = [{"id": 3, "status": "pending"}]
+    status, subscribed = open_stream(
+        flask_app, {"role": "hotel", "login_id": "spice"}, monkeypatch
+    )
+    assert status == 401 and subscribed == []
@@ -0,0 +1,127 @@
+import gzip
+import os
+
+import pytest
+from werkzeug.exceptions import NotFound
+
+from app.services import assets
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "js").mkdir()
+    (tmp_path / "css" / "site.css").write_text("/* x */\n.a {\n  color: red;\n}\n")
+    (tmp_path / "js" / "app.js").write_text("function f() {\n    return 1;\n}\n\n")
+
+    dist = tmp_path / "dist"
+    monkeypatch.setattr(assets, "STATIC_ROOT", str(tmp_path))
+    monkeypatch.setattr(assets, "DIST_DIR", str(dist))
+    monkeypatch.setattr(assets, "MANIFEST", str(dist / "manifest.json"))
+    monkeypatch.setattr(assets, "_manifest", {})
+    monkeypatch.setattr(assets, "_outputs", set())
+    return tmp_path
+
+
+def rebuild(static, text, keep=2):
+    (static / "css" / "site.css").write_text(text)
+    return assets.build(keep)["css/site.css"]
+
+
+# ---------------- BUILD ----------------
+def test_build_writes_fingerprinted_bundles(static):
+    manifest = assets.build()
+
+    css = manifest["css/site.css"]
+    assert assets.FINGERPRINTED.match(css)
+    assert (static / "dist" / css).read_text() == ".a{color:red}"
+    assert gzip.decompress((static / "dist" / (css + ".gz")).read_bytes()) == (
+        b".a{color:red}"
+    )
+    assert (static / "dist" / manifest["js/app.js"]).read_text() == (
+        "function f() {\nreturn 1;\n}"
+    )
+    assert not assets.is_stale()
+
+
+def test_build_keeps_previous_outputs(static):
+    first = rebuild(static, ".a{color:red}")
+    second = rebuild(static, ".a{color:blue}")
+    os.utime(static / "dist" / first, (1, 1))  # older than the second build
+    third = rebuild(static, ".a{color:green}")
+
+    files = set(os.listdir(static / "dist"))
+    assert {second, third} <= files
+    assert first not in files and first + ".gz" not in files
+
+
+def test_unchanged_rebuild_stays_newest(static):
+    first = rebuild(static, ".a{color:red}")
+    second = rebuild(static, ".a{color:blue}")
+    os.utime(static / "dist" / second, (1, 1))
+
+    # Rebuilding the first content again makes it current and kept
+    assert rebuild(static, ".a{color:red}", keep=1) == first
+    assert set(assets.output_files()) == {first, assets.build(1)["js/app.js"]}
+
+
+def test_auto_build_only_when_asked(static):
+    assert assets.load_manifest() == {}
+    assert not (static / "dist").exists()
+
+    manifest = assets.load_manifest(auto_build=True)
+    assert set(manifest) == {"css/site.css", "js/app.js"}
+
+
+# ---------------- SERVE ----------------
+@pytest.fixture
+def built(static, flask_app, monkeypatch):
+    old = rebuild(static, ".a{color:red}")
+    new = rebuild(static, ".a{color:blue}")
+    assets.load_manifest()
+    return flask_app, old, new
+
+
+def fetch(flask_app, filename, accept_encoding=None):
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    with flask_app.test_request_context(headers=headers):
+        return assets.serve_asset(filename)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("*", "br"),
+        ("br;q=0, *;q=0.1", "gzip"),
+        ("xbrotli", None),
+    ],
+)
+def test_serve_negotiates_encoding(built, accept_encoding, expected):
+    flask_app, _, new = built
+    response = fetch(flask_app, new, accept_encoding)
+    response.direct_passthrough = False
+
+    assert response.headers.get("Content-Encoding") == expected
+    assert "Accept-Encoding" in response.vary
+    assert response.cache_control.immutable
+    if expected is None:
+        assert response.get_data() == b".a{color:blue}"
+
+
+def test_serve_previous_build_and_nothing_else(built):
+    flask_app, old, _ = built
+    assert fetch(flask_app, old).status_code == 200
+    for filename in ("manifest.json", old + ".gz", "../css/site.css"):
+        with pytest.raises(NotFound):
+            fetch(flask_app, filename)
+
+
+def test_asset_url_falls_back_to_static(built):
+    flask_app, _, new = built
+    with flask_app.test_request_context():
+        assert assets.asset_url("css/site.css") == f"/assets/{new}"
+        assert assets.asset_url("css/missing.css") == "/static/css/missing.css"
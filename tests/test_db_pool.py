@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from app.models.db import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        time.sleep(self.conn.query_time)
+
+
+class FakeConnection:
+    def __init__(self, query_time=0.0):
+        self.closed = 0
+        self.query_time = query_time
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(minconn=2, maxconn=2, query_time=0.0, **kwargs):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection(query_time))
+        return opened[-1]
+
+    pool = ConnectionPool(minconn, maxconn, connect=connect, **kwargs)
+    return pool, opened
+
+
+def test_health_checks_do_not_open_past_maxconn():
+    # Every checkout runs a slow health check outside the lock
+    pool, opened = make_pool(query_time=0.02, health_check_interval=0.0)
+    errors = []
+
+    def work():
+        try:
+            for _ in range(5):
+                conn = pool.getconn()
+                time.sleep(0.005)
+                pool.putconn(conn)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    stats = pool.stats()
+    assert errors == []
+    assert len(opened) == 2
+    assert stats["created"] == 2 and stats["size"] == 2 and stats["idle"] == 2
+
+
+def test_failed_health_check_replaces_the_connection():
+    pool, opened = make_pool(minconn=1, maxconn=1)
+    opened[0].closed = 1
+
+    conn = pool.getconn()
+    assert conn is opened[1]
+    assert pool.stats()["health_check_failures"] == 1
+    pool.putconn(conn)
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_connect_frees_the_slot():
+    pool, opened = make_pool(minconn=0, maxconn=1, timeout=0.1)
+    connect = pool._connect
+
+    def fail():
+        raise RuntimeError("database down")
+
+    pool._connect = fail
+    with pytest.raises(RuntimeError):
+        pool.getconn()
+    assert pool.stats()["in_use"] == 0
+
+    pool._connect = connect
+    pool.putconn(pool.getconn())
+    assert pool.stats()["size"] == 1
+
+
+def test_full_pool_times_out():
+    pool, _ = make_pool(minconn=1, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+    pool.putconn(conn)
+
+
+def test_putconn_closes_connections_beyond_maxconn():
+    pool, _ = make_pool(minconn=2, maxconn=2)
+    extra = FakeConnection()
+    pool.putconn(extra)
+
+    assert extra.closed
+    assert pool.stats()["idle"] == 2
+
+
+def test_putconn_discards_expired_connections():
+    pool, opened = make_pool(minconn=0, maxconn=2, max_lifetime=0.01)
+    conn = pool.getconn()
+    time.sleep(0.02)
+    pool.putconn(conn)
+
+    assert conn.closed
+    assert pool.stats()["recycled"] == 1 and pool.stats()["idle"] == 0
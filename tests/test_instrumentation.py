@@ -0,0 +1,27 @@
+from app.models.instrumentation import InstrumentedCursor
+
+
+class FakeCursor:
+    itersize = 2000
+    arraysize = 1
+
+    def execute(self, query, params=None):
+        self.query = query
+
+
+def test_cursor_settings_reach_the_wrapped_cursor():
+    raw = FakeCursor()
+    cur = InstrumentedCursor(raw)
+
+    cur.itersize = 500
+    cur.arraysize = 50
+
+    assert raw.itersize == 500 and raw.arraysize == 50
+    assert cur.itersize == 500
+    assert "itersize" not in vars(cur)
+
+
+def test_execute_outside_a_request_passes_through():
+    raw = FakeCursor()
+    InstrumentedCursor(raw).execute("SELECT 1")
+    assert raw.query == "SELECT 1"
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from app.services.inventory import (
+    ORDER_STOCK_SQL,
+    apply_order_stock,
+    check_order_stock,
+    order_stock_params,
+)
+
+
+def result(applied=2, previously_applied=0, found=2, wanted=2):
+    return {
+        "applied": applied,
+        "previously_applied": previously_applied,
+        "found": found,
+        "wanted": wanted,
+    }
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.executed = []
+
+    def execute(self, query, params):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return self.row
+
+
+def test_params_cover_every_placeholder():
+    params = order_stock_params(7, "confirm")
+    assert params == {"order_id": 7, "reason": "confirm", "strict": True}
+    assert set(re.findall(r"%\((\w+)\)s", ORDER_STOCK_SQL)) == set(params)
+
+
+def test_all_lines_applied():
+    assert check_order_stock(result(), order_stock_params(7, "confirm")) == 2
+
+
+def test_short_stock_raises_when_strict():
+    with pytest.raises(Exception, match="Item unavailable"):
+        check_order_stock(result(applied=1), order_stock_params(7, "confirm"))
+
+
+def test_deleted_menu_row_is_reported_as_such():
+    with pytest.raises(Exception, match="no longer on the menu"):
+        check_order_stock(result(applied=1, found=1), order_stock_params(7, "confirm"))
+
+
+def test_second_attempt_for_an_order_is_a_no_op():
+    # Confirmed earlier: the ledger already holds the order's lines
+    params = order_stock_params(7, "complete")
+    assert check_order_stock(result(applied=0, previously_applied=2), params) == 0
+
+
+def test_not_strict_never_raises():
+    params = order_stock_params(7, "complete", strict=False)
+    assert check_order_stock(result(applied=1, found=1), params) == 1
+
+
+def test_apply_order_stock_runs_one_statement():
+    cur = FakeCursor(result())
+    assert apply_order_stock(cur, 7, reason="confirm") == 2
+    assert cur.executed == [(ORDER_STOCK_SQL, order_stock_params(7, "confirm"))]
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pytest
+
+from app.services import kitchen_queue
+from app.services.kitchen_queue import KitchenQueue, KitchenQueues
+
+
+def order(order_id, priority, status="preparing"):
+    return {"id": order_id, "priority": priority, "order_status": status}
+
+
+def ids(orders):
+    return [o["id"] for o in orders]
+
+
+def event(name, order_id, hotel_id=1):
+    return {"event": name, "order_id": order_id, "hotel_id": hotel_id}
+
+
+# ---------------- KitchenQueue ----------------
+def test_queue_orders_by_priority():
+    kitchen = KitchenQueue([order(1, "b"), order(2, "a"), order(3, "c")])
+    assert ids(kitchen.ordered()) == [2, 1, 3]
+    assert ids(kitchen.top(2)) == [2, 1]
+
+
+def test_queue_upsert_moves_and_remove_drops():
+    kitchen = KitchenQueue([order(1, "b"), order(2, "a"), order(3, "c")])
+    kitchen.ordered()
+
+    kitchen.upsert(order(3, "0"))
+    kitchen.remove(2)
+    kitchen.remove(99)
+
+    assert ids(kitchen.ordered()) == [3, 1]
+    assert len(kitchen) == 2
+
+
+def test_queue_equal_priorities_break_ties_by_id():
+    kitchen = KitchenQueue([order(5, "a"), order(4, "a")])
+    kitchen.remove(5)
+    assert ids(kitchen.ordered()) == [4]
+
+
+# ---------------- KitchenQueues ----------------
+class SlowLoads(KitchenQueues):
+    """Loads block until released, so events can race them."""
+
+    def __init__(self, orders, ttl=300):
+        super().__init__(ttl)
+        self.orders = orders
+        self.loads = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def _load(self, hotel_id):
+        self.loads += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return KitchenQueue(self.orders)
+
+
+def test_one_loader_per_hotel():
+    queues = SlowLoads([order(1, "a")])
+    results = []
+    readers = [
+        threading.Thread(target=lambda: results.append(ids(queues.ordered(1))))
+        for _ in range(5)
+    ]
+    for reader in readers:
+        reader.start()
+    assert queues.started.wait(5)
+    time.sleep(0.05)
+    queues.release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert queues.loads == 1
+    assert results == [[1]] * 5
+
+
+def test_events_during_load_are_replayed():
+    queues = SlowLoads([order(1, "b"), order(2, "c")])
+    reader = threading.Thread(target=queues.ordered, args=(1,))
+    reader.start()
+    assert queues.started.wait(5)
+
+    assert queues.tracks(1)
+    queues.on_event(event("placed", 3), order(3, "a"))
+    queues.on_event(event("completed", 2), None)
+    queues.release.set()
+    reader.join(5)
+
+    assert ids(queues.ordered(1)) == [3, 1]
+
+
+def test_resync_during_load_reloads_on_next_read():
+    queues = SlowLoads([order(1, "a")])
+    reader = threading.Thread(target=queues.ordered, args=(1,))
+    reader.start()
+    assert queues.started.wait(5)
+    queues.on_resync()
+    queues.release.set()
+    reader.join(5)
+
+    queues.ordered(1)
+    assert queues.loads == 2
+
+
+def test_failed_load_is_retried_by_the_next_reader():
+    queues = KitchenQueues(300)
+    attempts = []
+
+    def load(hotel_id):
+        attempts.append(hotel_id)
+        if len(attempts) == 1:
+            raise RuntimeError("database down")
+        return KitchenQueue([order(1, "a")])
+
+    queues._load = load
+    with pytest.raises(RuntimeError):
+        queues.ordered(1)
+    assert not queues.tracks(1)
+    assert ids(queues.ordered(1)) == [1]
+
+
+def test_stale_queue_is_served_while_reloading():
+    queues = SlowLoads([order(1, "a")], ttl=0)
+    queues.release.set()
+    queues.ordered(1)
+
+    queues.release.clear()
+    queues.started.clear()
+    reader = threading.Thread(target=queues.ordered, args=(1,))
+    reader.start()
+    assert queues.started.wait(5)
+
+    # A second reader does not wait for the running reload
+    assert ids(queues.ordered(1)) == [1]
+    queues.release.set()
+    reader.join(5)
+    assert queues.loads == 2
+
+
+def test_event_for_a_finished_order_removes_it():
+    queues = SlowLoads([order(1, "a"), order(2, "b")])
+    queues.release.set()
+    queues.ordered(1)
+
+    # e.g. a late "placed" fetched after the order was completed
+    queues.on_event(event("placed", 2), order(2, "b", status="completed"))
+    queues.on_event(event("cancelled", 1), None)
+    assert queues.ordered(1) == []
+
+
+# ---------------- apply_local_event ----------------
+def test_local_event_is_visible_before_the_notify(monkeypatch):
+    queues = SlowLoads([order(1, "a")])
+    queues.release.set()
+    queues.ordered(1)
+    monkeypatch.setattr(kitchen_queue, "_queues", queues)
+    monkeypatch.setattr(kitchen_queue, "_queues_pid", kitchen_queue.os.getpid())
+    monkeypatch.setattr(
+        kitchen_queue, "fetch_kitchen_order", lambda order_id: order(order_id, "0")
+    )
+
+    kitchen_queue.apply_local_event("placed", 2, 1)
+    assert ids(queues.ordered(1)) == [2, 1]
+
+    kitchen_queue.apply_local_event("completed", 1, 1)
+    assert ids(queues.ordered(1)) == [2]
+
+
+def test_local_event_skips_untracked_hotels(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(kitchen_queue, "_queues", KitchenQueues(300))
+    monkeypatch.setattr(kitchen_queue, "_queues_pid", kitchen_queue.os.getpid())
+    monkeypatch.setattr(kitchen_queue, "fetch_kitchen_order", fetched.append)
+
+    kitchen_queue.apply_local_event("placed", 2, 1)
+    assert fetched == []
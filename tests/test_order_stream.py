@@ -0,0 +1,51 @@
+import queue
+import threading
+
+import pytest
+
+import app.routes.hotel as hotel
+
+
+class FakeFeed:
+    def __init__(self):
+        self.subscribed = []
+
+    def subscribe(self, hotel_id):
+        self.subscribed.append(hotel_id)
+        return queue.Queue()
+
+    def unsubscribe(self, hotel_id, q):
+        self.subscribed.remove(hotel_id)
+
+
+@pytest.fixture
+def stream(flask_app, monkeypatch):
+    feed = FakeFeed()
+    monkeypatch.setattr(hotel, "hotel_required", lambda: True)
+    monkeypatch.setattr(hotel, "current_hotel_id", lambda: 1)
+    monkeypatch.setattr(hotel, "get_order_feed", lambda: feed)
+    monkeypatch.setattr(hotel, "_stream_slots", threading.BoundedSemaphore(1))
+
+    def open_stream():
+        with flask_app.test_request_context():
+            response = hotel.orders_stream()
+        return response.response
+
+    return open_stream, feed
+
+
+def test_streams_beyond_the_cap_are_told_to_reload(stream):
+    open_stream, feed = stream
+
+    first = open_stream()
+    assert next(first) == "retry: 3000\n\n"
+    assert feed.subscribed == [1]
+
+    second = list(open_stream())
+    assert second[0].startswith("event: busy\n")
+    assert feed.subscribed == [1]
+
+    # Closing a screen frees its thread for the next one
+    first.close()
+    assert feed.subscribed == []
+    assert next(open_stream()) == "retry: 3000\n\n"
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.pagination import (
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+    keyset_filter,
+    page_size,
+)
+from config import Config
+
+
+@pytest.mark.parametrize(
+    "ts",
+    [
+        datetime(2026, 1, 2, 3, 4, 5),
+        datetime(2026, 1, 2, 3, 4, 5, 123456),
+        datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    ],
+)
+def test_cursor_round_trip(ts):
+    token = encode_cursor(ts, 42)
+    assert "=" not in token
+    assert decode_cursor(token) == (ts, 42)
+
+
+@pytest.mark.parametrize("token", [None, "", "!!!", "bm9waXBl", "eHx5", "é"])
+def test_bad_cursor_is_ignored(token):
+    assert decode_cursor(token) is None
+
+
+def test_keyset_filter():
+    assert keyset_filter("o.created_at", "o.id", None) == ("TRUE", [])
+    cursor = (datetime(2026, 1, 1), 9)
+    assert keyset_filter("o.created_at", "o.id", cursor) == (
+        "(o.created_at, o.id) < (%s, %s)",
+        [datetime(2026, 1, 1), 9],
+    )
+
+
+class FakeCursor:
+    """Serves rows newest first, honouring the keyset filter and LIMIT."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r["ts"], r["id"]), reverse=True)
+
+    def execute(self, query, params):
+        *after, self.limit = params
+        rows = self.rows
+        if after:
+            rows = [r for r in rows if (r["ts"], r["id"]) < tuple(after)]
+        self.result = rows[: self.limit]
+
+    def fetchall(self):
+        return self.result
+
+
+def test_pages_cover_every_row_once():
+    start = datetime(2026, 1, 1)
+    # Equal timestamps across page boundaries are told apart by id
+    rows = [{"id": i, "ts": start + timedelta(minutes=i // 3)} for i in range(10)]
+    cur = FakeCursor(rows)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        where, params = keyset_filter("ts", "id", decode_cursor(cursor))
+        page, cursor = fetch_page(cur, f"SELECT ... WHERE {where}", params, 4, "ts")
+        seen += [r["id"] for r in page]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == sorted(range(10), reverse=True)
+
+
+def test_last_full_page_has_no_next_cursor():
+    cur = FakeCursor([{"id": i, "ts": datetime(2026, 1, 1)} for i in range(4)])
+    page, cursor = fetch_page(cur, "SELECT", [], 4, "ts")
+    assert len(page) == 4 and cursor is None
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("", Config.ADMIN_PAGE_SIZE),
+        ("?per_page=5", 5),
+        ("?per_page=0", Config.ADMIN_PAGE_SIZE),
+        ("?per_page=-3", 1),
+        ("?per_page=100000", Config.ADMIN_PAGE_SIZE_MAX),
+        ("?per_page=abc", Config.ADMIN_PAGE_SIZE),
+    ],
+)
+def test_page_size_is_clamped(flask_app, query, expected):
+    with flask_app.test_request_context("/" + query):
+        assert page_size() == expected
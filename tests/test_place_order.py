@@ -0,0 +1,169 @@
+import pytest
+
+import app.routes.user as user
+from app.services.inventory import ORDER_STOCK_SQL
+
+MENU = {"id": 3, "item_name": "Dosa", "price": 60, "available_quantity": 5}
+HOTEL = {"seating_capacity": 40, "slot_minutes": 30, "dining_minutes": 90}
+CART = {
+    "hotel_id": 1,
+    "total_people": 2,
+    "total_amount": 120,
+    "scheduled_time": "2026-03-10T19:00",
+    "items": [{"menu_id": 3, "qty": 2}],
+}
+
+
+class ScriptedConnection:
+    """Answers each fetch with the next scripted row(s); logs statements."""
+
+    def __init__(self, stock):
+        self.results = [
+            [MENU],  # menus
+            {"id": 9},  # INSERT orders
+            HOTEL,  # book_slot: hotel
+            {"order_id": 9},  # book_slot: reserved
+            stock,  # ORDER_STOCK_SQL
+        ]
+        self.log = []
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        self.log.append(query)
+
+    def fetchone(self):
+        return self.results.pop(0)
+
+    fetchall = fetchone
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def place(flask_app, monkeypatch):
+    confirmed = []
+    monkeypatch.setattr(user, "index_booking", lambda *args: None)
+    monkeypatch.setattr(user, "apply_local_event", lambda *args: None)
+    monkeypatch.setattr(user, "order_confirmed", lambda *args: confirmed.append(args))
+
+    def run(payment_mode, stock):
+        conn = ScriptedConnection(stock)
+        monkeypatch.setattr(user, "get_db_connection", lambda: conn)
+        with flask_app.test_request_context(
+            method="POST", json=dict(CART, payment_mode=payment_mode)
+        ):
+            user.session.update({"role": "user", "user_id": 5})
+            response = user.place_order()
+        return response, conn.log, confirmed
+
+    return run
+
+
+def stock(applied):
+    return {"applied": applied, "previously_applied": 0, "found": 1, "wanted": 1}
+
+
+def test_cod_order_is_confirmed_in_the_placing_transaction(place):
+    response, log, confirmed = place("cod", stock(1))
+
+    assert response.get_json()["success"] is True
+    assert log.index(ORDER_STOCK_SQL) < log.index("COMMIT")
+    assert log.count("COMMIT") == 1 and "ROLLBACK" not in log
+    assert confirmed == [(9, 1)]
+
+
+def test_cod_stock_shortfall_rolls_back_order_and_table(place):
+    (response, status), log, confirmed = place("cod", stock(0))
+
+    assert status == 500
+    assert "COMMIT" not in log and log[-1] == "ROLLBACK"
+    assert confirmed == []
+
+
+def test_online_order_takes_stock_at_payment(place):
+    response, log, confirmed = place("online", stock(1))
+
+    assert "payment_url" in response.get_json()
+    assert ORDER_STOCK_SQL not in log
+    assert confirmed == []
+
+
+def test_failed_confirmation_of_a_replayed_order_cancels_it(flask_app, monkeypatch):
+    cancelled, events = [], []
+
+    def fail(order_id):
+        raise Exception("Item unavailable")
+
+    monkeypatch.setattr(user, "process_confirmed_order", fail)
+    monkeypatch.setattr(
+        user, "cancel_order", lambda order_id: cancelled.append(order_id) or 1
+    )
+    monkeypatch.setattr(user, "apply_local_event", lambda *args: events.append(args))
+
+    order = {
+        "id": 9,
+        "payment_mode": "cod",
+        "qr_code": None,
+        "order_status": "preparing",
+    }
+    with flask_app.test_request_context():
+        _, status = user.replay_order(order)
+
+        assert status == 500
+        assert cancelled == [9]
+        assert events == [("cancelled", 9, 1)]
+
+        order["order_status"] = "cancelled"
+        _, status = user.replay_order(order)
+        assert status == 409
+
+
+# ---------------- payment_success ----------------
+class OneRowConnection:
+    def __init__(self, row):
+        self.row = row
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize(
+    "row, failure, expected",
+    [
+        ({"qr_code": None, "order_status": "paid"}, None, 302),
+        ({"qr_code": None, "order_status": "paid"}, "Item unavailable", 500),
+        ({"qr_code": None, "order_status": "cancelled"}, None, 410),
+        ({"qr_code": "ORDER_ID:9", "order_status": "paid"}, "unused", 302),
+    ],
+)
+def test_payment_success(flask_app, monkeypatch, row, failure, expected):
+    def confirm(order_id):
+        if failure:
+            raise Exception(failure)
+
+    monkeypatch.setattr(user, "get_db_connection", lambda: OneRowConnection(row))
+    monkeypatch.setattr(user, "process_confirmed_order", confirm)
+    with flask_app.test_request_context():
+        user.session.update({"role": "user", "user_id": 5})
+        response = user.payment_success(9)
+
+    status = response[1] if isinstance(response, tuple) else response.status_code
+    assert status == expected
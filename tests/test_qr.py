@@ -0,0 +1,40 @@
+import app.routes.user as user
+from app.services import qr
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+
+def test_confirm_stores_the_image_url(monkeypatch):
+    monkeypatch.setattr(user, "apply_order_stock", lambda *args, **kwargs: 1)
+    cur = FakeCursor()
+    user.confirm_order(cur, 9)
+
+    query, params = cur.executed[-1]
+    assert "qr_image_url" in query
+    assert params == (qr.qr_value(9), "/user/qr/9.png", 9)
+
+
+def test_order_success_does_not_wait_for_a_render(flask_app, monkeypatch):
+    # Confirmed before the URL was stored at confirmation time
+    order = {"qr_code": qr.qr_value(9), "qr_image_url": None}
+    monkeypatch.setattr(user, "fetch_order_qr", lambda order_id, user_id: order)
+    monkeypatch.setattr(user, "ensure_qr", None)  # must not be called
+
+    with flask_app.test_request_context():
+        user.session.update({"role": "user", "user_id": 5})
+        page = user.order_success(9)
+
+    assert "/user/qr/9.png" in page
+
+
+def test_order_success_unconfirmed_order(flask_app, monkeypatch):
+    monkeypatch.setattr(user, "fetch_order_qr", lambda order_id, user_id: None)
+    with flask_app.test_request_context():
+        user.session.update({"role": "user", "user_id": 5})
+        assert user.order_success(9)[1] == 404
@@ -0,0 +1,160 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.services import reservations
+from app.services.reservations import (
+    HotelSlots,
+    SlotIndex,
+    SlotUnavailable,
+    book_slot,
+    release_slots,
+    unindex_slots,
+)
+
+DAY = date(2026, 3, 10)
+
+
+def at(hour, minute=0, day=DAY):
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+def slots(capacity=10):
+    # 30 minute slots, a table is held for 90 minutes (3 slots)
+    return HotelSlots(capacity, 30, 90)
+
+
+# ---------------- HotelSlots ----------------
+def test_slot_starts_cover_the_dining_time():
+    assert slots().slot_starts(at(19, 40)) == [at(19, 30), at(20), at(20, 30)]
+
+
+def test_booking_blocks_every_overlapping_start():
+    hotel = slots()
+    for start in hotel.slot_starts(at(20)):
+        hotel.add(start, 8)
+
+    free = hotel.available(DAY, 4)
+    # Held 20:00-21:30: 18:30 ends as it starts, 21:30 starts as it ends
+    assert at(18, 30) in free and at(21, 30) in free
+    for blocked in (at(19), at(19, 30), at(20), at(20, 30), at(21)):
+        assert blocked not in free
+    assert at(20) in hotel.available(DAY, 2)
+
+
+def test_late_booking_runs_into_the_next_day():
+    hotel = slots()
+    hotel.add(at(0, day=date(2026, 3, 11)), 10)
+    free = hotel.available(DAY, 1)
+    assert at(23) not in free and at(22) in free
+
+
+def test_not_before_and_capacity():
+    hotel = slots()
+    assert hotel.available(DAY, 11) == []
+    assert hotel.available(DAY, 2, not_before=at(12, 10))[0] == at(12, 30)
+    assert hotel.available(DAY, 2, not_before=at(1, day=date(2026, 3, 11))) == []
+
+
+# ---------------- SlotIndex ----------------
+class FakeIndex(SlotIndex):
+    def __init__(self, ttl=300):
+        super().__init__(ttl)
+        self.loads = []
+
+    def _load(self, hotel_id=None):
+        self.loads.append(hotel_id)
+        return {1: slots(capacity=4)}
+
+
+def test_index_record_and_release():
+    index = FakeIndex()
+    assert index.available(2, DAY, 1) is None
+    assert at(20) in index.available(1, DAY, 4)
+
+    starts = slots().slot_starts(at(20))
+    index.record(1, starts, 3)
+    assert at(20) not in index.available(1, DAY, 2)
+
+    # A cancelled order gives its seats back
+    index.record(1, starts, -3)
+    assert at(20) in index.available(1, DAY, 4)
+
+
+def test_index_reloads_after_ttl_and_invalidate():
+    index = FakeIndex(ttl=300)
+    index.available(1, DAY, 1)
+    index.available(1, DAY, 1)
+    assert index.loads == [1]
+
+    index.invalidate(1)
+    index.available(1, DAY, 1)
+    assert index.loads == [1, 1]
+
+    index.ttl = 0
+    index.available(1, DAY, 1)
+    assert index.loads == [1, 1, 1]
+
+
+def test_unindex_slots_updates_only_a_built_index(monkeypatch):
+    index = FakeIndex()
+    index.available(1, DAY, 1)
+    freed = [{"hotel_id": 1, "slot_start": at(20), "people": 2}]
+
+    monkeypatch.setattr(reservations, "_index", None)
+    unindex_slots(freed)  # nothing to update, and nothing built
+
+    index.record(1, [at(20)], 4)
+    monkeypatch.setattr(reservations, "_index", index)
+    monkeypatch.setattr(reservations, "_index_pid", reservations.os.getpid())
+    unindex_slots(freed)
+    assert at(20) in index.available(1, DAY, 2)
+    assert at(20) not in index.available(1, DAY, 3)
+
+
+# ---------------- DATABASE SIDE ----------------
+class FakeCursor:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.executed = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+    def fetchall(self):
+        return self.rows.pop(0)
+
+
+def test_book_slot_books_every_overlapped_slot():
+    hotel = {"seating_capacity": 10, "slot_minutes": 30, "dining_minutes": 90}
+    cur = FakeCursor(hotel, {"order_id": 5})
+
+    booked = book_slot(cur, 5, 1, "2026-03-10T19:40", 2)
+
+    assert booked == [at(19, 30), at(20), at(20, 30)]
+    params = cur.executed[1][1]
+    assert params["slot_count"] == 3 and params["slot_start"] == at(19, 30)
+
+
+def test_book_slot_full_invalidates_the_index(monkeypatch):
+    index = FakeIndex()
+    index.available(1, DAY, 1)
+    monkeypatch.setattr(reservations, "get_slot_index", lambda: index)
+    hotel = {"seating_capacity": 10, "slot_minutes": 30, "dining_minutes": 90}
+
+    with pytest.raises(SlotUnavailable):
+        book_slot(FakeCursor(hotel, None), 5, 1, at(20), 2)
+    index.available(1, DAY, 1)
+    assert index.loads == [1, 1]
+
+
+def test_release_slots():
+    assert release_slots(FakeCursor(), []) == []
+
+    freed = [{"hotel_id": 1, "slot_start": at(20), "people": 2}]
+    cur = FakeCursor(freed)
+    assert release_slots(cur, (5, 6)) == freed
+    assert cur.executed[0][1] == {"order_ids": [5, 6]}